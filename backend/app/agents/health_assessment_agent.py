@@ -1,27 +1,273 @@
 import logging
-import json
-from typing import Optional, Callable, Awaitable
-from openai import AsyncOpenAI
-from enum import Enum
+import asyncio
+import re
+import sys
+from datetime import date
+from collections import OrderedDict
+from functools import lru_cache
+from typing import TYPE_CHECKING, Optional, Awaitable, Callable
+import orjson
+from enum import IntEnum
 
 from app.config import get_settings
 from app.models.schemas import Language, CallSession, HealthRating, LimitationLevel
 from app.services.session_manager import session_manager
 
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
+
 logger = logging.getLogger(__name__)
 
+# Month names (English and Spanish) for spoken dates of birth
+_MONTHS = {
+    "january": 1, "february": 2, "march": 3, "april": 4, "may": 5, "june": 6,
+    "july": 7, "august": 8, "september": 9, "october": 10, "november": 11, "december": 12,
+    "enero": 1, "febrero": 2, "marzo": 3, "abril": 4, "mayo": 5, "junio": 6,
+    "julio": 7, "agosto": 8, "septiembre": 9, "setiembre": 9, "octubre": 10,
+    "noviembre": 11, "diciembre": 12,
+}
+_MONTH_NAMES = "|".join(_MONTHS)
+
+# Fast-path patterns for authentication data (avoid an LLM round-trip)
+_DOB_NUMERIC_RE = re.compile(r"\b(\d{1,2})[/.-](\d{1,2})[/.-](\d{4}|\d{2})\b")
+_DOB_SPOKEN_EN_RE = re.compile(
+    rf"\b({_MONTH_NAMES})\s+(\d{{1,2}})(?:st|nd|rd|th)?,?\s+(\d{{4}})\b", re.IGNORECASE
+)
+_DOB_SPOKEN_ES_RE = re.compile(
+    rf"\b(\d{{1,2}})\s+de\s+({_MONTH_NAMES})\s+(?:de\s+|del\s+)?(\d{{4}})\b", re.IGNORECASE
+)
+_SSN4_RE = re.compile(
+    r"(?:ssn|social|last\s+(?:four|4)|seguro|[uú]ltimos\s+(?:cuatro|4))\D{0,40}?\b(\d{4})\b",
+    re.IGNORECASE
+)
+_ZIP_RE = re.compile(r"\b\d{5}\b")
+# Hints that an utterance mentions a field, keyed like the parsed auth dict
+_AUTH_CUE_RES = {
+    "dob": re.compile(r"\b(?:born|birth\w*|nac\w*)\b", re.IGNORECASE),
+    "zip": re.compile(r"\b(?:zip|postal)\b", re.IGNORECASE),
+    "ssn4": re.compile(r"\b(?:ssn|social|seguro)\b", re.IGNORECASE),
+}
+# Leftover digits or month names mean the regexes missed something
+_AUTH_LEFTOVER_RE = re.compile(rf"\d|\b(?:{_MONTH_NAMES})\b", re.IGNORECASE)
+
+
+# Punctuation that STT adds around keywords ("Yes.", "one,")
+_NORM_TABLE = str.maketrans({c: " " for c in ".,!?;:¡¿"})
+
+
+def _normalize_input(text: str) -> str:
+    """Lowercase, strip punctuation and collapse whitespace."""
+    normalized = " ".join(text.lower().translate(_NORM_TABLE).split())
+    # Short inputs ("yes", "continue") recur constantly and key the caches
+    return sys.intern(normalized) if len(normalized) <= 32 else normalized
+
+
+# Keyword vocabulary, grouped by the intent/answer each keyword signals.
+# Transition intents use plain string keys; answers use their enum member.
+_CONTINUE = "continue"
+_INTRO_CONTINUE = "intro_continue"
+_SMS_OPT_IN = "sms_opt_in"
+
+# Common paraphrases of "yes" that callers use instead of the scripted keyword
+_AFFIRMATIVES = (
+    "yeah", "yep", "yup", "sure", "of course", "go ahead",
+    "claro", "vale", "dale", "de acuerdo", "por supuesto",
+)
+
+_KEYWORD_GROUPS = {
+    _CONTINUE: ("continue", "continuar", "yes", "sí", "1", "one") + _AFFIRMATIVES,
+    _INTRO_CONTINUE: ("continue", "continuar", "yes", "sí", "1", "one", "ok", "okay") + _AFFIRMATIVES,
+    _SMS_OPT_IN: ("yes", "sí", "1", "one", "okay", "ok") + _AFFIRMATIVES,
+    HealthRating.EXCELLENT: ("excellent", "excelente", "1", "one"),
+    HealthRating.VERY_GOOD: ("very good", "muy buena", "muy bien", "2", "two"),
+    HealthRating.GOOD: ("good", "buena", "bien", "3", "three"),
+    HealthRating.FAIR: ("fair", "regular", "4", "four"),
+    HealthRating.POOR: ("poor", "mala", "mal", "5", "five"),
+    LimitationLevel.LIMITED_A_LOT: ("limited a lot", "muy limitado", "1", "one", "a lot"),
+    LimitationLevel.LIMITED_A_LITTLE: ("limited a little", "poco limitado", "2", "two", "a little"),
+    LimitationLevel.NOT_LIMITED: ("not limited", "sin limitación", "no", "3", "three", "not at all"),
+}
+
+# keyword -> every group it belongs to ("1" signals continue, excellent, ...)
+_KEYWORD_INDEX: dict[str, frozenset] = {}
+for _group, _words in _KEYWORD_GROUPS.items():
+    for _word in _words:
+        _KEYWORD_INDEX[_word] = _KEYWORD_INDEX.get(_word, frozenset()) | {_group}
+
+# One whole-word alternation over the entire vocabulary, longest phrases
+# first so "very good" wins over "good" at the same position
+_KEYWORD_RE = re.compile(
+    r"\b(?:" + "|".join(map(re.escape, sorted(_KEYWORD_INDEX, key=len, reverse=True))) + r")\b"
+)
+
+
+@lru_cache(maxsize=1024)
+def _match_keywords(normalized: str) -> frozenset:
+    """Scan the input once and return every keyword group that matched."""
+    groups = frozenset()
+    for match in _KEYWORD_RE.finditer(normalized):
+        groups |= _KEYWORD_INDEX[match.group(0)]
+    return groups
+
+
+# A negation anywhere in the input ("no, please don't", "not sure",
+# "no quiero") means a yes-keyword in it isn't consent
+_NEGATION_RE = re.compile(r"\b(?:no|not|don't|dont|nope|never|nunca)\b")
+
+
+def _is_affirmative(normalized: str, intent: str) -> bool:
+    """Whether the input signals a yes-style intent and isn't negated."""
+    return intent in _match_keywords(normalized) and not _NEGATION_RE.search(normalized)
+
+
+class ConversationState(IntEnum):
+    GREETING = 1
+    AUTHENTICATION = 2
+    INTRO_ASSESSMENT = 3
+    QUESTION_GENERAL_HEALTH = 4
+    QUESTION_MODERATE_ACTIVITIES = 5
+    QUESTION_CLIMBING_STAIRS = 6
+    SMS_OPT_IN = 7
+    PHONE_NUMBER_COLLECTION = 8
+    FAREWELL = 9
+    COMPLETED = 10
+
+    @property
+    def label(self) -> str:
+        """Readable state name (e.g. "question_general_health") for prompts and logs."""
+        return self.name.lower()
+
+
+# Per-state task instructions, keyed by (state, language)
+STATE_PROMPTS: dict[tuple[ConversationState, Language], str] = {
+    (ConversationState.GREETING, Language.ENGLISH): (
+        "Greet {first_name} and explain this is Zappix calling for their annual health assessment. "
+        "Ask them to say 'Continue' or press 1 to continue."
+    ),
+    (ConversationState.GREETING, Language.SPANISH): (
+        "Saluda a {first_name} y explica que Zappix está llamando para su evaluación de salud anual. "
+        "Pídele que diga 'Continuar' o presione 1 para continuar."
+    ),
+    (ConversationState.AUTHENTICATION, Language.ENGLISH): (
+        "Ask for their date of birth and zip code for verification. "
+        "You need 2 out of 3: date of birth, zip code, or last 4 digits of SSN."
+    ),
+    (ConversationState.AUTHENTICATION, Language.SPANISH): (
+        "Pide su fecha de nacimiento y código postal para verificación. "
+        "Necesitas 2 de 3: fecha de nacimiento, código postal, o últimos 4 dígitos del SSN."
+    ),
+    (ConversationState.INTRO_ASSESSMENT, Language.ENGLISH): (
+        "Explain that this assessment asks questions about their health to help them access the right benefits. "
+        "Assure them their answers won't affect their benefits."
+    ),
+    (ConversationState.INTRO_ASSESSMENT, Language.SPANISH): (
+        "Explica que esta evaluación hace preguntas sobre su salud para ayudarles a acceder a los beneficios correctos. "
+        "Asegúrales que sus respuestas no afectarán sus beneficios."
+    ),
+    (ConversationState.QUESTION_GENERAL_HEALTH, Language.ENGLISH): (
+        "Ask: Generally, how would you say your health is? Options are: "
+        "Excellent (1), Very Good (2), Good (3), Fair (4), or Poor (5)."
+    ),
+    (ConversationState.QUESTION_GENERAL_HEALTH, Language.SPANISH): (
+        "Pregunta: En general, ¿cómo diría que está su salud? Las opciones son: "
+        "Excelente (1), Muy Buena (2), Buena (3), Regular (4), o Mala (5)."
+    ),
+    (ConversationState.QUESTION_MODERATE_ACTIVITIES, Language.ENGLISH): (
+        "Ask: Does your health now limit you in doing moderate activities such as moving a table or bowling? "
+        "Options: Limited a Lot (1), Limited a Little (2), or Not Limited at All (3)."
+    ),
+    (ConversationState.QUESTION_MODERATE_ACTIVITIES, Language.SPANISH): (
+        "Pregunta: ¿Su salud ahora le limita en actividades moderadas como mover una mesa o jugar boliche? "
+        "Opciones: Muy Limitado (1), Poco Limitado (2), o Sin Limitación (3)."
+    ),
+    (ConversationState.QUESTION_CLIMBING_STAIRS, Language.ENGLISH): (
+        "Ask: Does your health now limit you in climbing several flights of stairs? "
+        "Options: Limited a Lot (1), Limited a Little (2), or Not Limited at All (3)."
+    ),
+    (ConversationState.QUESTION_CLIMBING_STAIRS, Language.SPANISH): (
+        "Pregunta: ¿Su salud ahora le limita al subir varios tramos de escaleras? "
+        "Opciones: Muy Limitado (1), Poco Limitado (2), o Sin Limitación (3)."
+    ),
+    (ConversationState.SMS_OPT_IN, Language.ENGLISH): (
+        "Explain they need to review and sign the form. Ask if they'd like to receive "
+        "a text message with a link. Tell them to press 1 or say yes to opt in."
+    ),
+    (ConversationState.SMS_OPT_IN, Language.SPANISH): (
+        "Explica que necesitan revisar y firmar el formulario. Pregunta si les gustaría recibir "
+        "un mensaje de texto con un enlace. Diles que presionen 1 o digan sí para aceptar."
+    ),
+    (ConversationState.PHONE_NUMBER_COLLECTION, Language.ENGLISH): (
+        "Ask them to enter their cell phone number followed by the pound key."
+    ),
+    (ConversationState.PHONE_NUMBER_COLLECTION, Language.SPANISH): (
+        "Pídeles que ingresen su número de celular seguido de la tecla numeral."
+    ),
+    (ConversationState.FAREWELL, Language.ENGLISH): (
+        "Thank them for completing the assessment. Let them know they'll receive "
+        "a text message shortly with a link to review and sign the form. Say goodbye warmly."
+    ),
+    (ConversationState.FAREWELL, Language.SPANISH): (
+        "Agradéceles por completar la evaluación. Hazles saber que recibirán "
+        "un mensaje de texto pronto con un enlace para revisar y firmar el formulario. Despídete cálidamente."
+    ),
+    (ConversationState.COMPLETED, Language.ENGLISH): (
+        "The conversation is complete. Say a brief goodbye if the user says anything else."
+    ),
+    (ConversationState.COMPLETED, Language.SPANISH): (
+        "La conversación ha terminado. Di un breve adiós si el usuario dice algo más."
+    ),
+}
+
+
+# Output token caps for LLM replies per state. Replies are short spoken
+# prompts; states that restate answer options get a little more room.
+DEFAULT_MAX_TOKENS = 200
+STATE_MAX_TOKENS: dict[ConversationState, int] = {
+    ConversationState.GREETING: 80,
+    ConversationState.AUTHENTICATION: 80,
+    ConversationState.INTRO_ASSESSMENT: 100,
+    ConversationState.QUESTION_GENERAL_HEALTH: 100,
+    ConversationState.QUESTION_MODERATE_ACTIVITIES: 100,
+    ConversationState.QUESTION_CLIMBING_STAIRS: 100,
+    ConversationState.SMS_OPT_IN: 100,
+    ConversationState.PHONE_NUMBER_COLLECTION: 60,
+    ConversationState.FAREWELL: 80,
+    ConversationState.COMPLETED: 40,
+}
+
+_openai_client: Optional["AsyncOpenAI"] = None
+
+
+def get_openai_client() -> "AsyncOpenAI":
+    """
+    Get the process-wide OpenAI client.
+    Shared by all agents so concurrent calls reuse one connection pool;
+    HTTP/2 multiplexes them over a single warm TLS connection.
+    """
+    global _openai_client
+    if _openai_client is None:
+        # Imported on first use: the SDK is heavy and not every importer of
+        # this module (e.g. shutdown hooks, tooling) needs a client
+        import httpx
+        from openai import AsyncOpenAI
+
+        _openai_client = AsyncOpenAI(
+            api_key=get_settings().openai_api_key,
+            http_client=httpx.AsyncClient(
+                http2=True,
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=50),
+                timeout=httpx.Timeout(30.0, connect=5.0),
+            ),
+        )
+    return _openai_client
+
 
-class ConversationState(str, Enum):
-    GREETING = "greeting"
-    AUTHENTICATION = "authentication"
-    INTRO_ASSESSMENT = "intro_assessment"
-    QUESTION_GENERAL_HEALTH = "question_general_health"
-    QUESTION_MODERATE_ACTIVITIES = "question_moderate_activities"
-    QUESTION_CLIMBING_STAIRS = "question_climbing_stairs"
-    SMS_OPT_IN = "sms_opt_in"
-    PHONE_NUMBER_COLLECTION = "phone_number_collection"
-    FAREWELL = "farewell"
-    COMPLETED = "completed"
+async def close_openai_client():
+    """Close the shared OpenAI client (application shutdown)."""
+    global _openai_client
+    if _openai_client is not None:
+        await _openai_client.close()
+        _openai_client = None
 
 
 class HealthAssessmentAgent:
@@ -30,171 +276,210 @@ class HealthAssessmentAgent:
     Handles the full conversation flow from authentication to SMS opt-in.
     """
 
-    SYSTEM_PROMPT_EN = """You are Aldea, a friendly and professional AI health assessment assistant calling on behalf of Zappix. 
-You are conducting an annual health assessment survey.
-
-Your personality:
-- Warm, empathetic, and patient
-- Professional but conversational
-- Clear and concise in your explanations
-- Helpful and accommodating
-
-Important guidelines:
-- Keep responses brief and natural for voice conversation
-- Wait for the user to respond before moving to the next question
-- Be understanding if users need clarification
-- Acknowledge their responses before asking the next question
-
-Current conversation state: {state}
-User's first name: {first_name}
-Authentication status: {auth_status}
-Collected answers: {answers}
-
-Based on the current state and user's last response, provide your next spoken response.
-Keep it conversational and appropriate for a phone call."""
-
-    SYSTEM_PROMPT_ES = """Eres Aldea, un asistente de IA amigable y profesional para evaluaciones de salud, llamando en nombre de Zappix.
-Estás realizando una encuesta de evaluación de salud anual.
-
-Tu personalidad:
-- Cálida, empática y paciente
-- Profesional pero conversacional
-- Clara y concisa en tus explicaciones
-- Servicial y complaciente
-
-Pautas importantes:
-- Mantén las respuestas breves y naturales para una conversación telefónica
-- Espera a que el usuario responda antes de pasar a la siguiente pregunta
-- Sé comprensiva si los usuarios necesitan aclaraciones
-- Reconoce sus respuestas antes de hacer la siguiente pregunta
-
-Estado actual de la conversación: {state}
-Nombre del usuario: {first_name}
-Estado de autenticación: {auth_status}
-Respuestas recopiladas: {answers}
-
-Basándote en el estado actual y la última respuesta del usuario, proporciona tu siguiente respuesta hablada.
-Mantenlo conversacional y apropiado para una llamada telefónica."""
+    # Exact-match cache of LLM responses shared by all sessions. The key
+    # covers everything in the prompt except the caller's name (state,
+    # language, auth status, collected answers, previous reply and the full
+    # normalized input); replies that mention the name are never stored.
+    RESPONSE_CACHE_SIZE = 512
+    # States whose prompt carries per-caller data beyond the state block
+    UNCACHED_STATES = frozenset({ConversationState.GREETING, ConversationState.AUTHENTICATION})
+
+    # Messages of history sent to the LLM. State and collected answers are
+    # already in the system prompt, so the last exchange is enough context.
+    HISTORY_WINDOW = 2
+    _response_cache: "OrderedDict[tuple, str]" = OrderedDict()
+
+    SYSTEM_PREFIX_EN = """You are Aldea, a warm, patient assistant calling on behalf of Zappix to conduct an annual health assessment.
+Speak briefly and naturally for a phone call; acknowledge answers and clarify when asked.
+Reply with your next spoken line for the current task."""
+
+    STATE_SUFFIX_EN = """State: {state}
+Name: {first_name}
+Auth: {auth_status}
+Answers: {answers}"""
+
+    SYSTEM_PREFIX_ES = """Eres Aldea, una asistente cálida y paciente que llama en nombre de Zappix para realizar una evaluación de salud anual.
+Habla de forma breve y natural para una llamada telefónica; reconoce las respuestas y aclara cuando te lo pidan.
+Responde con tu siguiente frase hablada para la tarea actual."""
+
+    STATE_SUFFIX_ES = """Estado: {state}
+Nombre: {first_name}
+Autenticación: {auth_status}
+Respuestas: {answers}"""
+
+    # Scripted replies spoken right after an on-script state transition.
+    # The LLM is only used when the caller's input doesn't advance the flow.
+    CANNED_RESPONSES_EN = {
+        ConversationState.AUTHENTICATION: (
+            "Great. Before we begin, I need to verify your identity. "
+            "Please tell me your date of birth and your zip code."
+        ),
+        ConversationState.INTRO_ASSESSMENT: (
+            "Thank you, you've been verified. This assessment asks a few questions about your health "
+            "to help you access the right benefits. Your answers won't affect your benefits. "
+            "Say continue when you're ready."
+        ),
+        ConversationState.QUESTION_GENERAL_HEALTH: (
+            "Generally, how would you say your health is? Excellent, very good, good, fair, or poor? "
+            "You can also press 1 through 5."
+        ),
+        ConversationState.QUESTION_MODERATE_ACTIVITIES: (
+            "Thank you. Does your health now limit you in doing moderate activities, "
+            "such as moving a table or bowling? Say limited a lot, limited a little, "
+            "or not limited at all. You can also press 1, 2, or 3."
+        ),
+        ConversationState.QUESTION_CLIMBING_STAIRS: (
+            "Got it. Does your health now limit you in climbing several flights of stairs? "
+            "Say limited a lot, limited a little, or not limited at all. You can also press 1, 2, or 3."
+        ),
+        ConversationState.SMS_OPT_IN: (
+            "Thank you for your answers. You'll need to review and sign the form. "
+            "Would you like to receive a text message with a link to it? Say yes or press 1."
+        ),
+        ConversationState.PHONE_NUMBER_COLLECTION: (
+            "Great. Please enter your cell phone number, followed by the pound key."
+        ),
+        ConversationState.FAREWELL: (
+            "Thank you, {first_name}, for completing your health assessment. "
+            "You'll receive a text message shortly with a link to review and sign your form. "
+            "Have a wonderful day. Goodbye!"
+        ),
+        ConversationState.COMPLETED: "Goodbye!",
+    }
+
+    CANNED_RESPONSES_ES = {
+        ConversationState.AUTHENTICATION: (
+            "Perfecto. Antes de comenzar, necesito verificar su identidad. "
+            "Por favor dígame su fecha de nacimiento y su código postal."
+        ),
+        ConversationState.INTRO_ASSESSMENT: (
+            "Gracias, su identidad ha sido verificada. Esta evaluación hace algunas preguntas sobre su salud "
+            "para ayudarle a acceder a los beneficios correctos. Sus respuestas no afectarán sus beneficios. "
+            "Diga continuar cuando esté listo."
+        ),
+        ConversationState.QUESTION_GENERAL_HEALTH: (
+            "En general, ¿cómo diría que está su salud? ¿Excelente, muy buena, buena, regular o mala? "
+            "También puede presionar del 1 al 5."
+        ),
+        ConversationState.QUESTION_MODERATE_ACTIVITIES: (
+            "Gracias. ¿Su salud ahora le limita en actividades moderadas, como mover una mesa "
+            "o jugar boliche? Diga muy limitado, poco limitado o sin limitación. "
+            "También puede presionar 1, 2 o 3."
+        ),
+        ConversationState.QUESTION_CLIMBING_STAIRS: (
+            "Entendido. ¿Su salud ahora le limita al subir varios tramos de escaleras? "
+            "Diga muy limitado, poco limitado o sin limitación. También puede presionar 1, 2 o 3."
+        ),
+        ConversationState.SMS_OPT_IN: (
+            "Gracias por sus respuestas. Necesitará revisar y firmar el formulario. "
+            "¿Le gustaría recibir un mensaje de texto con un enlace? Diga sí o presione 1."
+        ),
+        ConversationState.PHONE_NUMBER_COLLECTION: (
+            "Perfecto. Por favor ingrese su número de celular seguido de la tecla numeral."
+        ),
+        ConversationState.FAREWELL: (
+            "Gracias, {first_name}, por completar su evaluación de salud. "
+            "Recibirá pronto un mensaje de texto con un enlace para revisar y firmar su formulario. "
+            "Que tenga un excelente día. ¡Adiós!"
+        ),
+        ConversationState.COMPLETED: "¡Adiós!",
+    }
 
     def __init__(self):
         self.settings = get_settings()
-        self.client = AsyncOpenAI(api_key=self.settings.openai_api_key)
+        self.client = get_openai_client()
         self.state = ConversationState.GREETING
         self.session: Optional[CallSession] = None
         self.detected_language: Optional[Language] = None
         self.conversation_history = []
+        self._prefix = self.SYSTEM_PREFIX_EN
+        self._state_context_key: Optional[tuple] = None
+        self._state_context_cache = ""
+        self._pending_write: Optional[asyncio.Task] = None
+        # State -> transition handler; states without an entry never advance
+        self._transitions: dict[ConversationState, Callable[[str, str], Awaitable[None]]] = {
+            ConversationState.GREETING: self._handle_greeting,
+            ConversationState.AUTHENTICATION: self._handle_authentication,
+            ConversationState.INTRO_ASSESSMENT: self._handle_intro_assessment,
+            ConversationState.QUESTION_GENERAL_HEALTH: self._handle_general_health,
+            ConversationState.QUESTION_MODERATE_ACTIVITIES: self._handle_moderate_activities,
+            ConversationState.QUESTION_CLIMBING_STAIRS: self._handle_climbing_stairs,
+            ConversationState.SMS_OPT_IN: self._handle_sms_opt_in,
+            ConversationState.PHONE_NUMBER_COLLECTION: self._handle_phone_number,
+            ConversationState.FAREWELL: self._handle_farewell,
+        }
 
     async def initialize(self, session: CallSession):
         """Initialize the agent with a session."""
         self.session = session
         self.detected_language = session.language
         self.state = ConversationState.GREETING
+        self._set_language_prefix()
+
+    def _set_language_prefix(self):
+        """Select the static system prompt prefix for the current language."""
+        self._prefix = (
+            self.SYSTEM_PREFIX_ES
+            if self.detected_language == Language.SPANISH
+            else self.SYSTEM_PREFIX_EN
+        )
 
     def _get_system_prompt(self) -> str:
-        """Get the appropriate system prompt based on language."""
+        """Get the static system prompt prefix for the current language."""
+        return self._prefix
+
+    def _get_state_context(self) -> str:
+        """
+        Get the dynamic state/answers block for the current turn.
+
+        Only re-rendered when the state, authentication status or
+        collected answers change.
+        """
+        authenticated = bool(self.session and self.session.authentication.authenticated)
+        answers = self.session.answers if self.session else None
+        answers_key = (
+            (answers.general_health, answers.moderate_activities_limitation, answers.climbing_stairs_limitation)
+            if answers else None
+        )
+        key = (self.detected_language, self.state, authenticated, answers_key)
+        if key == self._state_context_key:
+            return self._state_context_cache
+
         template = (
-            self.SYSTEM_PROMPT_ES
+            self.STATE_SUFFIX_ES
             if self.detected_language == Language.SPANISH
-            else self.SYSTEM_PROMPT_EN
+            else self.STATE_SUFFIX_EN
         )
 
-        auth_status = "Not authenticated"
-        if self.session and self.session.authentication.authenticated:
-            auth_status = "Authenticated"
-
         answers_summary = "None collected yet"
-        if self.session:
-            answers = []
-            if self.session.answers.general_health:
-                answers.append(f"General health: {self.session.answers.general_health}")
-            if self.session.answers.moderate_activities_limitation:
-                answers.append(f"Moderate activities: {self.session.answers.moderate_activities_limitation}")
-            if self.session.answers.climbing_stairs_limitation:
-                answers.append(f"Climbing stairs: {self.session.answers.climbing_stairs_limitation}")
-            if answers:
-                answers_summary = ", ".join(answers)
-
-        return template.format(
-            state=self.state.value,
+        if answers:
+            collected = []
+            if answers.general_health:
+                collected.append(f"General health: {answers.general_health}")
+            if answers.moderate_activities_limitation:
+                collected.append(f"Moderate activities: {answers.moderate_activities_limitation}")
+            if answers.climbing_stairs_limitation:
+                collected.append(f"Climbing stairs: {answers.climbing_stairs_limitation}")
+            if collected:
+                answers_summary = ", ".join(collected)
+
+        suffix = template.format(
+            state=self.state.label,
             first_name=self.session.first_name if self.session else "User",
-            auth_status=auth_status,
+            auth_status="Authenticated" if authenticated else "Not authenticated",
             answers=answers_summary
         )
 
+        self._state_context_key = key
+        self._state_context_cache = suffix
+        return suffix
+
     def _get_state_prompt(self) -> str:
         """Get specific instructions for the current conversation state."""
-        is_spanish = self.detected_language == Language.SPANISH
-
-        prompts = {
-            ConversationState.GREETING: (
-                f"Greet {self.session.first_name} and explain this is Zappix calling for their annual health assessment. "
-                "Ask them to say 'Continue' or press 1 to continue."
-                if not is_spanish else
-                f"Saluda a {self.session.first_name} y explica que Zappix está llamando para su evaluación de salud anual. "
-                "Pídele que diga 'Continuar' o presione 1 para continuar."
-            ),
-            ConversationState.AUTHENTICATION: (
-                "Ask for their date of birth and zip code for verification. "
-                "You need 2 out of 3: date of birth, zip code, or last 4 digits of SSN."
-                if not is_spanish else
-                "Pide su fecha de nacimiento y código postal para verificación. "
-                "Necesitas 2 de 3: fecha de nacimiento, código postal, o últimos 4 dígitos del SSN."
-            ),
-            ConversationState.INTRO_ASSESSMENT: (
-                "Explain that this assessment asks questions about their health to help them access the right benefits. "
-                "Assure them their answers won't affect their benefits."
-                if not is_spanish else
-                "Explica que esta evaluación hace preguntas sobre su salud para ayudarles a acceder a los beneficios correctos. "
-                "Asegúrales que sus respuestas no afectarán sus beneficios."
-            ),
-            ConversationState.QUESTION_GENERAL_HEALTH: (
-                "Ask: Generally, how would you say your health is? Options are: "
-                "Excellent (1), Very Good (2), Good (3), Fair (4), or Poor (5)."
-                if not is_spanish else
-                "Pregunta: En general, ¿cómo diría que está su salud? Las opciones son: "
-                "Excelente (1), Muy Buena (2), Buena (3), Regular (4), o Mala (5)."
-            ),
-            ConversationState.QUESTION_MODERATE_ACTIVITIES: (
-                "Ask: Does your health now limit you in doing moderate activities such as moving a table or bowling? "
-                "Options: Limited a Lot (1), Limited a Little (2), or Not Limited at All (3)."
-                if not is_spanish else
-                "Pregunta: ¿Su salud ahora le limita en actividades moderadas como mover una mesa o jugar boliche? "
-                "Opciones: Muy Limitado (1), Poco Limitado (2), o Sin Limitación (3)."
-            ),
-            ConversationState.QUESTION_CLIMBING_STAIRS: (
-                "Ask: Does your health now limit you in climbing several flights of stairs? "
-                "Options: Limited a Lot (1), Limited a Little (2), or Not Limited at All (3)."
-                if not is_spanish else
-                "Pregunta: ¿Su salud ahora le limita al subir varios tramos de escaleras? "
-                "Opciones: Muy Limitado (1), Poco Limitado (2), o Sin Limitación (3)."
-            ),
-            ConversationState.SMS_OPT_IN: (
-                "Explain they need to review and sign the form. Ask if they'd like to receive "
-                "a text message with a link. Tell them to press 1 or say yes to opt in."
-                if not is_spanish else
-                "Explica que necesitan revisar y firmar el formulario. Pregunta si les gustaría recibir "
-                "un mensaje de texto con un enlace. Diles que presionen 1 o digan sí para aceptar."
-            ),
-            ConversationState.PHONE_NUMBER_COLLECTION: (
-                "Ask them to enter their cell phone number followed by the pound key."
-                if not is_spanish else
-                "Pídeles que ingresen su número de celular seguido de la tecla numeral."
-            ),
-            ConversationState.FAREWELL: (
-                "Thank them for completing the assessment. Let them know they'll receive "
-                "a text message shortly with a link to review and sign the form. Say goodbye warmly."
-                if not is_spanish else
-                "Agradéceles por completar la evaluación. Hazles saber que recibirán "
-                "un mensaje de texto pronto con un enlace para revisar y firmar el formulario. Despídete cálidamente."
-            ),
-            ConversationState.COMPLETED: (
-                "The conversation is complete. Say a brief goodbye if the user says anything else."
-                if not is_spanish else
-                "La conversación ha terminado. Di un breve adiós si el usuario dice algo más."
-            )
-        }
-
-        return prompts.get(self.state, "Continue the conversation naturally.")
+        template = STATE_PROMPTS.get((self.state, self.detected_language or Language.ENGLISH))
+        if template is None:
+            return "Continue the conversation naturally."
+        return template.format(first_name=self.session.first_name)
 
     async def process_user_input(
         self,
@@ -211,34 +496,16 @@ Mantenlo conversacional y apropiado para una llamada telefónica."""
         Returns:
             Tuple of (response_text, is_call_complete)
         """
-        # Update language if detected
-        if detected_language and detected_language.startswith("es"):
-            self.detected_language = Language.SPANISH
-            if self.session:
-                self.session.language = Language.SPANISH
-                await session_manager.update_session(self.session)
-
-        # Add user input to history
-        self.conversation_history.append({
-            "role": "user",
-            "content": user_input
-        })
-
-        # Process based on state and input
-        await self._process_state_transition(user_input)
+        # Built on the streaming path so both share one implementation
+        sentences = []
+        is_complete = False
+        async for sentence, complete in self.process_user_input_streaming(user_input, detected_language):
+            if complete:
+                is_complete = True
+            elif sentence:
+                sentences.append(sentence)
 
-        # Generate response
-        response = await self._generate_response(user_input)
-
-        # Add response to history
-        self.conversation_history.append({
-            "role": "assistant",
-            "content": response
-        })
-
-        is_complete = self.state == ConversationState.COMPLETED
-
-        return response, is_complete
+        return " ".join(sentences), is_complete
 
     async def process_user_input_streaming(
         self,
@@ -254,6 +521,7 @@ Mantenlo conversacional y apropiado para una llamada telefónica."""
         # Update language if detected
         if detected_language and detected_language.startswith("es"):
             self.detected_language = Language.SPANISH
+            self._set_language_prefix()
             if self.session:
                 self.session.language = Language.SPANISH
                 await session_manager.update_session(self.session)
@@ -265,14 +533,17 @@ Mantenlo conversacional y apropiado para una llamada telefónica."""
         })
 
         # Process based on state and input
-        await self._process_state_transition(user_input)
+        normalized = _normalize_input(user_input)
+        previous_state = self.state
+        await self._process_state_transition(user_input, normalized)
+        advanced = self.state != previous_state
 
         # Stream response and yield sentences
         buffer = ""
         full_response = ""
         sentence_endings = '.!?'
         
-        async for chunk in self._generate_response_stream(user_input):
+        async for chunk in self._generate_response_stream(normalized, advanced):
             buffer += chunk
             full_response += chunk
             
@@ -299,6 +570,8 @@ Mantenlo conversacional y apropiado para una llamada telefónica."""
         if buffer.strip():
             yield buffer.strip(), False
 
+        await self._flush_session_write()
+
         # Add full response to history
         self.conversation_history.append({
             "role": "assistant",
@@ -310,106 +583,116 @@ Mantenlo conversacional y apropiado para una llamada telefónica."""
         if is_complete:
             yield "", True
 
-    async def _process_state_transition(self, user_input: str):
-        """Process state transitions based on user input."""
-        input_lower = user_input.lower()
-
-        if self.state == ConversationState.GREETING:
-            if any(word in input_lower for word in ["continue", "continuar", "yes", "sí", "1", "one"]):
-                self.state = ConversationState.AUTHENTICATION
-
-        elif self.state == ConversationState.AUTHENTICATION:
-            # Extract authentication info using LLM
-            auth_info = await self._extract_auth_info(user_input)
-            if auth_info:
-                await session_manager.update_authentication(
-                    self.session.session_id,
-                    date_of_birth=auth_info.get("dob"),
-                    zip_code=auth_info.get("zip"),
-                    last_four_ssn=auth_info.get("ssn4")
-                )
-                # Refresh session
-                self.session = await session_manager.get_session(self.session.session_id)
-
-                if self.session.authentication.authenticated:
-                    self.state = ConversationState.INTRO_ASSESSMENT
-
-        elif self.state == ConversationState.INTRO_ASSESSMENT:
-            if any(word in input_lower for word in ["continue", "continuar", "yes", "sí", "1", "one", "ok", "okay"]):
-                self.state = ConversationState.QUESTION_GENERAL_HEALTH
-
-        elif self.state == ConversationState.QUESTION_GENERAL_HEALTH:
-            health = self._parse_health_response(input_lower)
-            if health:
-                await session_manager.update_answers(
-                    self.session.session_id,
-                    general_health=health
-                )
-                self.session = await session_manager.get_session(self.session.session_id)
-                self.state = ConversationState.QUESTION_MODERATE_ACTIVITIES
-
-        elif self.state == ConversationState.QUESTION_MODERATE_ACTIVITIES:
-            limitation = self._parse_limitation_response(input_lower)
-            if limitation:
-                await session_manager.update_answers(
-                    self.session.session_id,
-                    moderate_activities=limitation
-                )
-                self.session = await session_manager.get_session(self.session.session_id)
-                self.state = ConversationState.QUESTION_CLIMBING_STAIRS
-
-        elif self.state == ConversationState.QUESTION_CLIMBING_STAIRS:
-            limitation = self._parse_limitation_response(input_lower)
-            if limitation:
-                await session_manager.update_answers(
-                    self.session.session_id,
-                    climbing_stairs=limitation
-                )
-                self.session = await session_manager.get_session(self.session.session_id)
-                self.state = ConversationState.SMS_OPT_IN
+    async def _process_state_transition(self, user_input: str, normalized: str):
+        """
+        Process state transitions based on user input.
+        Keyword checks use the normalized input; extractors get the raw text.
+        """
+        handler = self._transitions.get(self.state)
+        if handler:
+            await handler(user_input, normalized)
+
+    async def _handle_greeting(self, user_input: str, normalized: str):
+        if _is_affirmative(normalized, _CONTINUE):
+            self.state = ConversationState.AUTHENTICATION
+
+    async def _handle_authentication(self, user_input: str, normalized: str):
+        # Extract authentication info (regex fast path, LLM fallback)
+        auth_info = await self._extract_auth_info(user_input)
+        if auth_info:
+            # update_* returns the saved session, no need to re-fetch it
+            self.session = await session_manager.update_authentication(
+                self.session.session_id,
+                date_of_birth=auth_info.get("dob"),
+                zip_code=auth_info.get("zip"),
+                last_four_ssn=auth_info.get("ssn4")
+            )
 
-        elif self.state == ConversationState.SMS_OPT_IN:
-            if any(word in input_lower for word in ["yes", "sí", "1", "one", "okay", "ok", "sure"]):
-                self.state = ConversationState.PHONE_NUMBER_COLLECTION
+            if self.session.authentication.authenticated:
+                self.state = ConversationState.INTRO_ASSESSMENT
+
+    async def _handle_intro_assessment(self, user_input: str, normalized: str):
+        if _is_affirmative(normalized, _INTRO_CONTINUE):
+            self.state = ConversationState.QUESTION_GENERAL_HEALTH
+
+    async def _handle_general_health(self, user_input: str, normalized: str):
+        health = self._parse_health_response(normalized)
+        if health:
+            self._start_session_write(session_manager.update_answers(
+                self.session.session_id,
+                general_health=health
+            ))
+            self.state = ConversationState.QUESTION_MODERATE_ACTIVITIES
+
+    async def _handle_moderate_activities(self, user_input: str, normalized: str):
+        limitation = self._parse_limitation_response(normalized)
+        if limitation:
+            self._start_session_write(session_manager.update_answers(
+                self.session.session_id,
+                moderate_activities=limitation
+            ))
+            self.state = ConversationState.QUESTION_CLIMBING_STAIRS
+
+    async def _handle_climbing_stairs(self, user_input: str, normalized: str):
+        limitation = self._parse_limitation_response(normalized)
+        if limitation:
+            self._start_session_write(session_manager.update_answers(
+                self.session.session_id,
+                climbing_stairs=limitation
+            ))
+            self.state = ConversationState.SMS_OPT_IN
+
+    async def _handle_sms_opt_in(self, user_input: str, normalized: str):
+        if _is_affirmative(normalized, _SMS_OPT_IN):
+            self.state = ConversationState.PHONE_NUMBER_COLLECTION
+
+    async def _handle_phone_number(self, user_input: str, normalized: str):
+        phone = self._extract_phone_number(user_input)
+        if phone:
+            self._start_session_write(session_manager.set_sms_opt_in(self.session.session_id, phone))
+            self.state = ConversationState.FAREWELL
+
+    async def _handle_farewell(self, user_input: str, normalized: str):
+        self.state = ConversationState.COMPLETED
+        self._start_session_write(session_manager.mark_call_completed(self.session.session_id))
+
+    def _start_session_write(self, write: Awaitable[Optional[CallSession]]):
+        """
+        Persist a session update in the background.
 
-        elif self.state == ConversationState.PHONE_NUMBER_COLLECTION:
-            phone = self._extract_phone_number(user_input)
-            if phone:
-                await session_manager.set_sms_opt_in(self.session.session_id, phone)
-                self.session = await session_manager.get_session(self.session.session_id)
-                self.state = ConversationState.FAREWELL
+        The next state is already decided locally, so the session-store write
+        overlaps with response generation instead of delaying it.
+        """
+        self._pending_write = asyncio.ensure_future(write)
 
-        elif self.state == ConversationState.FAREWELL:
-            self.state = ConversationState.COMPLETED
-            await session_manager.mark_call_completed(self.session.session_id)
+    async def _flush_session_write(self):
+        """Wait for any in-flight session write and adopt the saved session."""
+        if self._pending_write is None:
+            return
+        pending, self._pending_write = self._pending_write, None
+        session = await pending
+        if session:
+            self.session = session
 
     def _parse_health_response(self, input_lower: str) -> Optional[str]:
         """Parse health rating from user response."""
-        if any(word in input_lower for word in ["excellent", "excelente", "1", "one"]):
-            return HealthRating.EXCELLENT.value
-        elif any(word in input_lower for word in ["very good", "muy buena", "muy bien", "2", "two"]):
-            return HealthRating.VERY_GOOD.value
-        elif any(word in input_lower for word in ["good", "buena", "bien", "3", "three"]):
-            return HealthRating.GOOD.value
-        elif any(word in input_lower for word in ["fair", "regular", "4", "four"]):
-            return HealthRating.FAIR.value
-        elif any(word in input_lower for word in ["poor", "mala", "mal", "5", "five"]):
-            return HealthRating.POOR.value
+        matched = _match_keywords(input_lower)
+        # Checked in enum order, which is also the match priority
+        for rating in HealthRating:
+            if rating in matched:
+                return rating.value
         return None
 
     def _parse_limitation_response(self, input_lower: str) -> Optional[str]:
         """Parse limitation level from user response."""
-        if any(phrase in input_lower for phrase in ["limited a lot", "muy limitado", "1", "one", "a lot"]):
-            return LimitationLevel.LIMITED_A_LOT.value
-        elif any(phrase in input_lower for phrase in ["limited a little", "poco limitado", "2", "two", "a little"]):
-            return LimitationLevel.LIMITED_A_LITTLE.value
-        elif any(phrase in input_lower for phrase in ["not limited", "sin limitación", "no", "3", "three", "not at all"]):
-            return LimitationLevel.NOT_LIMITED.value
+        matched = _match_keywords(input_lower)
+        for level in LimitationLevel:
+            if level in matched:
+                return level.value
         return None
 
     def _extract_phone_number(self, input_text: str) -> Optional[str]:
         """Extract phone number from user input."""
-        import re
         # Remove non-numeric characters except +
         digits = re.sub(r'[^\d+]', '', input_text)
         # Check if it looks like a valid phone number (at least 10 digits)
@@ -417,8 +700,76 @@ Mantenlo conversacional y apropiado para una llamada telefónica."""
             return digits
         return None
 
+    @staticmethod
+    def _format_dob(month: int, day: int, year: int) -> Optional[str]:
+        """Format date parts as MM/DD/YYYY, or None if they aren't a valid date."""
+        if year < 100:
+            year += 1900 if year > date.today().year % 100 else 2000
+        try:
+            return date(year, month, day).strftime("%m/%d/%Y")
+        except ValueError:
+            return None
+
+    def _parse_auth_info(self, user_input: str) -> tuple[dict, bool]:
+        """
+        Extract authentication information with regular expressions.
+
+        Returns the parsed fields and whether they account for everything
+        the utterance appears to contain.
+        """
+        text = user_input
+        dob = None
+
+        match = _DOB_NUMERIC_RE.search(text)
+        if match:
+            dob = self._format_dob(int(match.group(1)), int(match.group(2)), int(match.group(3)))
+        else:
+            match = _DOB_SPOKEN_EN_RE.search(text)
+            if match:
+                dob = self._format_dob(
+                    _MONTHS[match.group(1).lower()], int(match.group(2)), int(match.group(3))
+                )
+            else:
+                match = _DOB_SPOKEN_ES_RE.search(text)
+                if match:
+                    dob = self._format_dob(
+                        _MONTHS[match.group(2).lower()], int(match.group(1)), int(match.group(3))
+                    )
+        if match:
+            # Don't let the year be picked up as an SSN/zip
+            text = text[:match.start()] + " " + text[match.end():]
+
+        ssn4 = None
+        match = _SSN4_RE.search(text)
+        if match:
+            ssn4 = match.group(1)
+            text = text[:match.start(1)] + " " + text[match.end(1):]
+
+        match = _ZIP_RE.search(text)
+        zip_code = None
+        if match:
+            zip_code = match.group(0)
+            text = text[:match.start()] + " " + text[match.end():]
+
+        auth_info = {"dob": dob, "zip": zip_code, "ssn4": ssn4}
+        complete = not _AUTH_LEFTOVER_RE.search(text) and not any(
+            auth_info[field] is None and cue.search(user_input)
+            for field, cue in _AUTH_CUE_RES.items()
+        )
+        return auth_info, complete
+
     async def _extract_auth_info(self, user_input: str) -> Optional[dict]:
-        """Use LLM to extract authentication information from natural language."""
+        """
+        Extract authentication information from natural language.
+        Tries the regex fast path first and only falls back to the LLM
+        when the utterance holds something the regexes didn't parse; the
+        regex fields are then merged over the LLM's.
+        """
+        parsed, complete = self._parse_auth_info(user_input)
+        found = {field: value for field, value in parsed.items() if value}
+        if complete:
+            return found or None
+
         extraction_prompt = """Extract any authentication information from the user's response.
 Return a JSON object with the following fields (use null for any not provided):
 - dob: Date of birth in MM/DD/YYYY format
@@ -437,54 +788,120 @@ Return ONLY the JSON object, no other text."""
                     "content": extraction_prompt.format(input=user_input)
                 }],
                 temperature=0,
-                max_tokens=100
+                max_tokens=100,
+                # JSON mode returns a bare object, no markdown fences to strip
+                response_format={"type": "json_object"}
             )
 
-            result = response.choices[0].message.content.strip()
-            # Parse JSON
-            if result.startswith("```"):
-                result = result.split("```")[1]
-                if result.startswith("json"):
-                    result = result[4:]
-            return json.loads(result)
+            auth_info = orjson.loads(response.choices[0].message.content)
+            if not isinstance(auth_info, dict):
+                return found or None
+            auth_info.update(found)
+            return auth_info
         except Exception as e:
             logger.error(f"Failed to extract auth info: {e}")
+            return found or None
+
+    def _get_canned_response(self) -> Optional[str]:
+        """Get the scripted reply for the current state, if there is one."""
+        responses = (
+            self.CANNED_RESPONSES_ES
+            if self.detected_language == Language.SPANISH
+            else self.CANNED_RESPONSES_EN
+        )
+        template = responses.get(self.state)
+        if template is None:
             return None
+        return template.format(first_name=self.session.first_name if self.session else "")
 
-    async def _generate_response(self, user_input: str) -> str:
-        """Generate agent response using OpenAI."""
-        # Collect streaming response into full text
-        full_response = ""
-        async for chunk in self._generate_response_stream(user_input):
-            full_response += chunk
-        return full_response
+    def _response_cache_key(self, normalized_input: str) -> Optional[tuple]:
+        """Build the shared cache key for this turn, or None if it can't be shared."""
+        if self.state in self.UNCACHED_STATES:
+            return None
+        authenticated = bool(self.session and self.session.authentication.authenticated)
+        answers = self.session.answers if self.session else None
+        answers_key = (
+            (answers.general_health, answers.moderate_activities_limitation, answers.climbing_stairs_limitation)
+            if answers else None
+        )
+        # The window ends with the current input; the rest is prior context
+        previous = tuple(m["content"] for m in self.conversation_history[-self.HISTORY_WINDOW:-1])
+        return (self.state, self.detected_language, authenticated, answers_key, previous, normalized_input)
+
+    def _get_cached_response(self, key: Optional[tuple]) -> Optional[str]:
+        """Look up a cached response."""
+        if key is None:
+            return None
+        cached = self._response_cache.get(key)
+        if cached is not None:
+            self._response_cache.move_to_end(key)
+        return cached
+
+    def _store_cached_response(self, key: Optional[tuple], response: str):
+        """Store a generated response unless it is specific to this caller."""
+        if key is None:
+            return
+        first_name = self.session.first_name if self.session else ""
+        if first_name and re.search(rf"\b{re.escape(first_name)}\b", response, re.IGNORECASE):
+            return
+        self._response_cache[key] = response
+        self._response_cache.move_to_end(key)
+        if len(self._response_cache) > self.RESPONSE_CACHE_SIZE:
+            self._response_cache.popitem(last=False)
+
+    async def _generate_response_stream(self, normalized_input: str, advanced: bool = False):
+        """
+        Generate agent response using OpenAI with streaming.
+
+        If the input just advanced the conversation to a scripted state the
+        canned reply is returned instead; the LLM only handles off-script input.
+        """
+        if advanced:
+            canned = self._get_canned_response()
+            if canned:
+                yield canned
+                return
+
+        cache_key = self._response_cache_key(normalized_input)
+        cached = self._get_cached_response(cache_key)
+        if cached is not None:
+            yield cached
+            return
+
+        # The prompt includes collected answers, so make sure they're saved
+        await self._flush_session_write()
 
-    async def _generate_response_stream(self, user_input: str):
-        """Generate agent response using OpenAI with streaming."""
         system_prompt = self._get_system_prompt()
+        state_context = self._get_state_context()
         state_prompt = self._get_state_prompt()
 
+        # One system message: static prefix first so it stays byte-identical
+        # across turns (prompt caching keys on the prefix); per-turn content follows.
         messages = [
-            {"role": "system", "content": system_prompt},
-            {"role": "system", "content": f"Current task: {state_prompt}"}
+            {"role": "system", "content": f"{system_prompt}\n\n{state_context}\nCurrent task: {state_prompt}"}
         ]
 
-        # Add conversation history (last 10 exchanges)
-        messages.extend(self.conversation_history[-20:])
+        # Add the most recent exchange (previous reply + current input)
+        messages.extend(self.conversation_history[-self.HISTORY_WINDOW:])
 
         try:
             stream = await self.client.chat.completions.create(
                 model=self.settings.openai_model,
                 messages=messages,
                 temperature=0.7,
-                max_tokens=200,
+                max_tokens=STATE_MAX_TOKENS.get(self.state, DEFAULT_MAX_TOKENS),
                 stream=True
             )
 
+            response_parts = []
             async for chunk in stream:
                 if chunk.choices[0].delta.content:
+                    response_parts.append(chunk.choices[0].delta.content)
                     yield chunk.choices[0].delta.content
 
+            if response_parts:
+                self._store_cached_response(cache_key, "".join(response_parts))
+
         except Exception as e:
             logger.error(f"Failed to generate response: {e}")
             # Fallback responses
@@ -493,26 +910,39 @@ Return ONLY the JSON object, no other text."""
             else:
                 yield "I'm sorry, I had a moment. Could you please repeat that?"
 
-    async def get_initial_greeting(self) -> str:
-        """Return the initial greeting for the call (pre-canned for fast response)."""
+    # Initial greeting: a personalized opener plus a fixed body, so the
+    # body's audio can be synthesized once and reused across calls
+    GREETING_OPENERS = {
+        Language.ENGLISH: "Hi {first_name},",
+        Language.SPANISH: "Hola {first_name},",
+    }
+    GREETING_BODIES = {
+        Language.ENGLISH: "this is Aldea calling from Zappix for your annual health assessment. Please say continue to get started.",
+        Language.SPANISH: "soy Aldea llamando de parte de Zappix para su evaluación de salud anual. ¿Puede decir continuar para comenzar?",
+    }
+
+    async def get_initial_greeting_parts(self) -> tuple[str, str]:
+        """Return the initial greeting as (personalized opener, fixed body)."""
         if not self.session:
             raise ValueError("Session not initialized")
 
         # Use pre-canned greeting for fast response (avoids LLM latency)
-        first_name = self.session.first_name
-        
-        if self.detected_language == Language.SPANISH:
-            greeting = f"Hola {first_name}, soy Aldea llamando de parte de Zappix para su evaluación de salud anual. ¿Puede decir continuar para comenzar?"
-        else:
-            greeting = f"Hi {first_name}, this is Aldea calling from Zappix for your annual health assessment. Please say continue to get started."
-        
+        language = self.detected_language if self.detected_language == Language.SPANISH else Language.ENGLISH
+        opener = self.GREETING_OPENERS[language].format(first_name=self.session.first_name)
+        body = self.GREETING_BODIES[language]
+
         # Add to conversation history
         self.conversation_history.append({
             "role": "assistant",
-            "content": greeting
+            "content": f"{opener} {body}"
         })
-        
-        return greeting
+
+        return opener, body
+
+    async def get_initial_greeting(self) -> str:
+        """Return the initial greeting for the call (pre-canned for fast response)."""
+        opener, body = await self.get_initial_greeting_parts()
+        return f"{opener} {body}"
 
 
 # Factory function
@@ -1,13 +1,16 @@
 import logging
 import asyncio
 import base64
-import json
+import binascii
+import re
 from typing import Optional, Callable, Awaitable
 from dataclasses import dataclass
 
-from app.config import get_settings
+import numpy as np
+import orjson
+
 from app.models.schemas import Language, CallSession
-from app.services.cartesia_tts import cartesia_tts
+from app.services.cartesia_tts import cartesia_tts, MULAW_8KHZ
 from app.services.deepgram_stt import deepgram_stt, DeepgramStreamingSession
 from app.services.zappix_service import zappix_service
 from app.agents.health_assessment_agent import HealthAssessmentAgent, create_health_assessment_agent
@@ -16,6 +19,27 @@ from app.services.session_manager import session_manager
 logger = logging.getLogger(__name__)
 
 
+# Twilio sends compact JSON with "event" first. Media events are nearly all
+# inbound traffic, so their payload is sliced out without a full parse.
+_MEDIA_EVENT_PREFIX = '{"event":"media"'
+_MEDIA_PAYLOAD_RE = re.compile(r'"payload":"([^"]*)"')
+
+
+def _build_ulaw_magnitude_table() -> np.ndarray:
+    """Absolute linear amplitude of each G.711 mu-law code."""
+    u = ~np.arange(256, dtype=np.int32) & 0xFF
+    exponent = (u >> 4) & 0x07
+    mantissa = u & 0x0F
+    return ((((mantissa << 3) + 0x84) << exponent) - 0x84).astype(np.uint16)
+
+
+_ULAW_MAGNITUDE = _build_ulaw_magnitude_table()
+
+# Twilio-ready audio for fixed prompts (the greeting body), keyed by
+# (language, text) and shared by all calls
+_prompt_audio_cache: dict[tuple[Language, str], bytes] = {}
+
+
 @dataclass
 class AudioConfig:
     """Audio configuration for the voice pipeline."""
@@ -30,29 +54,76 @@ class VoicePipeline:
     Integrates STT (Deepgram), LLM (OpenAI via HealthAssessmentAgent), and TTS (Cartesia).
     """
 
+    # One pipeline (and handler) per live call; slots keep them compact
+    __slots__ = (
+        "session", "on_audio_output", "on_call_complete", "wait_for_playout", "agent", "stt_session",
+        "audio_config", "_running", "_speaking", "_current_transcript",
+        "_silence_frames", "_speech_detected", "_audio_in_q", "_stt_forward_task",
+        "_transcript_q", "_transcript_task", "_tts_pipeline_q", "_tts_tasks",
+        "_tts_sender_task", "_stopped",
+    )
+
+    # Inbound 20ms Twilio frames coalesced into one Deepgram send (100ms,
+    # the low end of the 100-250ms chunks Deepgram recommends)
+    STT_BATCH_FRAMES = 5
+    # Flush a partial batch this long after its first frame, so a pause in
+    # inbound audio doesn't hold the last frames back from Deepgram
+    STT_BATCH_TIMEOUT = 0.1
+    # Inbound frames buffered while Deepgram is slow (1s); oldest dropped beyond that
+    STT_QUEUE_FRAMES = 50
+    # Frames whose mean amplitude is below this are treated as silence
+    SILENCE_THRESHOLD = 100
+    # Silent frames still forwarded after speech (500ms), so Deepgram's
+    # 300ms endpointing sees the pause and finalizes the transcript
+    SILENCE_HANGOVER_FRAMES = 25
+    # Deepgram closes the stream after ~10s without data; send a KeepAlive
+    # whenever no audio has been forwarded for this long
+    STT_KEEPALIVE_INTERVAL = 5.0
+    # Sentences synthesized ahead of the one being sent
+    TTS_PIPELINE_DEPTH = 4
+
     def __init__(
         self,
         session: CallSession,
         on_audio_output: Callable[[bytes], Awaitable[None]],
-        on_call_complete: Optional[Callable[[], Awaitable[None]]] = None
+        on_call_complete: Optional[Callable[[], Awaitable[None]]] = None,
+        wait_for_playout: Optional[Callable[[], Awaitable[None]]] = None
     ):
-        self.settings = get_settings()
         self.session = session
         self.on_audio_output = on_audio_output
         self.on_call_complete = on_call_complete
+        # Resolves once the caller has heard all audio sent so far
+        self.wait_for_playout = wait_for_playout
 
         self.agent: Optional[HealthAssessmentAgent] = None
         self.stt_session: Optional[DeepgramStreamingSession] = None
         self.audio_config = AudioConfig()
 
         self._running = False
+        # Set by stop(); waits on the TTS pipeline give up when it fires
+        self._stopped = asyncio.Event()
         self._speaking = False
         self._current_transcript = ""
         self._silence_frames = 0
         self._speech_detected = False
 
-        # Audio buffer for Deepgram (needs 24kHz, but Twilio sends 8kHz)
-        self._audio_buffer = bytearray()
+        # Decouples the Twilio read loop from Deepgram send latency
+        self._audio_in_q: asyncio.Queue[bytes] = asyncio.Queue(maxsize=self.STT_QUEUE_FRAMES)
+        self._stt_forward_task: Optional[asyncio.Task] = None
+
+        # Final transcripts (and DTMF) are handled one at a time, in order,
+        # so replies never overlap
+        self._transcript_q: asyncio.Queue[tuple[str, Optional[str]]] = asyncio.Queue()
+        self._transcript_task: Optional[asyncio.Task] = None
+
+        # Each sentence is synthesized by its own task into its own audio
+        # queue; the sender drains those queues in sentence order. Later
+        # sentences synthesize while earlier ones are still being sent.
+        self._tts_pipeline_q: asyncio.Queue[asyncio.Queue[Optional[bytes]]] = asyncio.Queue(
+            maxsize=self.TTS_PIPELINE_DEPTH
+        )
+        self._tts_tasks: set[asyncio.Task] = set()
+        self._tts_sender_task: Optional[asyncio.Task] = None
 
     async def start(self):
         """Start the voice pipeline (full initialization including greeting)."""
@@ -75,59 +146,163 @@ class VoicePipeline:
                 on_transcript=self._on_transcript
             )
             await self.stt_session.connect()
+            self._stt_forward_task = asyncio.create_task(self._forward_stt_audio())
             logger.info("STT session initialized successfully")
         except Exception as e:
             logger.error(f"Failed to initialize STT (continuing without it): {e}")
             self.stt_session = None
 
         self._running = True
+        self._transcript_task = asyncio.create_task(self._transcript_worker())
+        self._tts_sender_task = asyncio.create_task(self._send_tts_audio())
 
     async def speak_greeting(self):
         """Generate and speak the initial greeting."""
         try:
-            greeting = await self.agent.get_initial_greeting()
-            logger.info(f"Speaking greeting: {greeting[:50]}...")
-            await self._speak(greeting)
+            opener, body = await self.agent.get_initial_greeting_parts()
+            logger.info(f"Speaking greeting: {opener} {body[:40]}...")
+            self._speaking = True
+            await self._speak_sentence(opener)
+            await self._speak_cached(body)
+            await self._until_stopped(self._tts_pipeline_q.join())
         except Exception as e:
             logger.error(f"Failed to speak greeting: {e}")
+        finally:
+            self._speaking = False
 
     async def stop(self):
         """Stop the voice pipeline."""
         logger.info(f"Stopping voice pipeline for session {self.session.session_id}")
         self._running = False
+        self._stopped.set()
+
+        if self._stt_forward_task:
+            self._stt_forward_task.cancel()
+            self._stt_forward_task = None
+
+        # stop() may be called by the worker itself once the call completes;
+        # it then exits on its own since _running is cleared
+        if self._transcript_task and self._transcript_task is not asyncio.current_task():
+            self._transcript_task.cancel()
+        self._transcript_task = None
+
+        if self._tts_sender_task:
+            self._tts_sender_task.cancel()
+            self._tts_sender_task = None
+        for task in self._tts_tasks:
+            task.cancel()
+        self._drain_tts_queue()
 
         if self.stt_session:
             await self.stt_session.close()
 
+        await cartesia_tts.close_ws(self.session.session_id)
+
         if self.on_call_complete:
             await self.on_call_complete()
 
+    async def _until_stopped(self, awaitable: Awaitable) -> bool:
+        """Await a TTS pipeline wait unless the pipeline stops first; returns whether it finished."""
+        task = asyncio.ensure_future(awaitable)
+        stopped = asyncio.ensure_future(self._stopped.wait())
+        try:
+            await asyncio.wait((task, stopped), return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            stopped.cancel()
+            if not task.done():
+                task.cancel()
+        return task.done() and not task.cancelled()
+
+    @property
+    def is_accepting_audio(self) -> bool:
+        """Whether caller audio is currently forwarded (not while the agent speaks)."""
+        return self._running and not self._speaking
+
     async def process_audio_input(self, audio_data: bytes):
         """
         Process incoming audio from Twilio.
         Audio is expected to be 8kHz mulaw.
         """
-        if not self._running or self._speaking:
+        if not self.is_accepting_audio:
             return
 
-        # Send raw mulaw audio directly to Deepgram (it expects mulaw at 8kHz)
-        if self.stt_session:
-            await self.stt_session.send_audio(audio_data)
+        if not self.stt_session:
+            return
+
+        # Drop silence beyond the hangover; Deepgram doesn't need it
+        if _ULAW_MAGNITUDE[np.frombuffer(audio_data, dtype=np.uint8)].mean() < self.SILENCE_THRESHOLD:
+            self._silence_frames += 1
+            if self._silence_frames > self.SILENCE_HANGOVER_FRAMES:
+                return
+        else:
+            self._silence_frames = 0
+
+        if self._audio_in_q.full():
+            # Deepgram is falling behind; drop the oldest frame rather than
+            # stall the Twilio read loop
+            self._audio_in_q.get_nowait()
+        self._audio_in_q.put_nowait(audio_data)
+
+    async def _forward_stt_audio(self):
+        """
+        Send queued inbound audio to Deepgram.
+        Raw 8kHz mulaw goes straight through (Deepgram accepts it), a few
+        frames per WebSocket message. KeepAlives hold the stream open
+        through silence and while the agent is speaking.
+        """
+        loop = asyncio.get_running_loop()
+        queue = self._audio_in_q
+
+        while True:
+            try:
+                batch = bytearray(await asyncio.wait_for(queue.get(), self.STT_KEEPALIVE_INTERVAL))
+            except asyncio.TimeoutError:
+                await self.stt_session.send_keepalive()
+                continue
+            frames = 1
+            deadline = loop.time() + self.STT_BATCH_TIMEOUT
+
+            while frames < self.STT_BATCH_FRAMES:
+                if queue.empty():
+                    remaining = deadline - loop.time()
+                    if remaining <= 0:
+                        break
+                    try:
+                        batch += await asyncio.wait_for(queue.get(), remaining)
+                    except asyncio.TimeoutError:
+                        break
+                else:
+                    batch += queue.get_nowait()
+                frames += 1
+
+            await self.stt_session.send_audio(bytes(batch))
 
     def _on_transcript(self, text: str, is_final: bool, detected_language: Optional[str]):
         """Callback for Deepgram transcripts."""
-        if not text.strip():
+        # isspace() answers the blank check without building a stripped copy
+        if not text or text.isspace():
             return
 
-        logger.debug(f"Transcript ({'final' if is_final else 'interim'}): {text}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Transcript ({'final' if is_final else 'interim'}): {text}")
 
         if is_final:
             self._current_transcript = text
             # Process final transcript
-            asyncio.create_task(self._process_transcript(text, detected_language))
+            self.submit_input(text, detected_language)
         else:
             self._speech_detected = True
 
+    def submit_input(self, text: str, detected_language: Optional[str] = None):
+        """Queue caller input (a final transcript or DTMF digit) for processing."""
+        self._transcript_q.put_nowait((text, detected_language))
+
+    async def _transcript_worker(self):
+        """Process queued caller input one turn at a time, in arrival order."""
+        while self._running:
+            text, detected_language = await self._transcript_q.get()
+            await self._process_transcript(text, detected_language)
+
     async def _process_transcript(self, text: str, detected_language: Optional[str]):
         """Process a final transcript and stream response sentence by sentence."""
         if not self.agent:
@@ -150,12 +325,16 @@ class VoicePipeline:
                     logger.info(f"Streaming sentence: {sentence[:40]}...")
                     # Stream this sentence through TTS
                     await self._speak_sentence(sentence)
-            
+
+            # Keep ignoring caller audio until the reply has been sent
+            await self._until_stopped(self._tts_pipeline_q.join())
             self._speaking = False
 
             # Check if call is complete
             if is_complete:
-                await asyncio.sleep(1)  # Brief pause after final message
+                # Let the farewell finish playing before the call is torn down
+                if self.wait_for_playout:
+                    await self.wait_for_playout()
                 await self.stop()
 
         except Exception as e:
@@ -169,35 +348,102 @@ class VoicePipeline:
             )
             await self._speak(error_msg)
 
-    async def _speak_sentence(self, text: str):
-        """Stream a single sentence through TTS to Twilio."""
+    async def _speak_sentence(self, text: str, cache_key: Optional[tuple[Language, str]] = None):
+        """
+        Start streaming a single sentence through TTS to Twilio.
+        Returns once synthesis is under way; audio is sent after any
+        sentences queued before it.
+        """
         if not text:
             return
 
+        audio_q: asyncio.Queue[Optional[bytes]] = asyncio.Queue()
+        if not await self._enqueue_sentence(audio_q):
+            return
+        task = asyncio.create_task(self._synthesize_into(audio_q, text, cache_key))
+        self._tts_tasks.add(task)
+        task.add_done_callback(self._tts_tasks.discard)
+
+    async def _speak_cached(self, text: str):
+        """
+        Queue a fixed prompt, reusing its audio from earlier calls.
+        The first call synthesizes it as usual and stores the result.
+        """
+        key = (self.session.language, text)
+        audio = _prompt_audio_cache.get(key)
+        if audio is None:
+            await self._speak_sentence(text, cache_key=key)
+            return
+
+        audio_q: asyncio.Queue[Optional[bytes]] = asyncio.Queue()
+        audio_q.put_nowait(audio)
+        audio_q.put_nowait(None)
+        await self._enqueue_sentence(audio_q)
+
+    async def _enqueue_sentence(self, audio_q: asyncio.Queue) -> bool:
+        """Queue a sentence's audio for sending; False once the pipeline has stopped."""
+        if not self._running:
+            return False
+        if not self._tts_pipeline_q.full():
+            self._tts_pipeline_q.put_nowait(audio_q)
+            return True
+        if not await self._until_stopped(self._tts_pipeline_q.put(audio_q)):
+            return False
+        if not self._running:
+            # The put went through as stop() was freeing space
+            self._drain_tts_queue()
+            return False
+        return True
+
+    def _drain_tts_queue(self):
+        """Mark queued sentences done once nothing will send them, so no join() waits on them."""
+        while not self._tts_pipeline_q.empty():
+            self._tts_pipeline_q.get_nowait()
+            self._tts_pipeline_q.task_done()
+
+    async def _synthesize_into(
+        self,
+        audio_q: asyncio.Queue,
+        text: str,
+        cache_key: Optional[tuple[Language, str]] = None
+    ):
+        """Synthesize a sentence into its audio queue, ending with None."""
         try:
-            # Use streaming TTS for lower latency
-            async for audio_chunk in cartesia_tts.synthesize_stream(
+            # Stream over the call's persistent TTS websocket, already in
+            # Twilio's 8kHz mulaw so chunks are queued as they arrive
+            chunks = []
+            async for mulaw_chunk in cartesia_tts.synthesize_websocket(
                 text,
-                language=self.session.language
+                session_id=self.session.session_id,
+                language=self.session.language,
+                output_format=MULAW_8KHZ
             ):
-                # Convert from 24kHz PCM to 8kHz mulaw for Twilio
-                mulaw_chunk = self._convert_for_twilio(audio_chunk)
-                # Send chunk immediately
-                await self.on_audio_output(mulaw_chunk)
+                audio_q.put_nowait(mulaw_chunk)
+                if cache_key:
+                    chunks.append(mulaw_chunk)
 
         except Exception as e:
             logger.error(f"Error in streaming TTS: {e}")
-            # Fallback to non-streaming
+            # Fallback to the HTTP endpoint, which streams raw audio bytes
             try:
-                audio_bytes = await cartesia_tts.synthesize(
+                async for mulaw_chunk in cartesia_tts.synthesize_stream(
                     text,
-                    language=self.session.language
-                )
-                mulaw_audio = self._convert_for_twilio(audio_bytes)
-                await self.on_audio_output(mulaw_audio)
+                    language=self.session.language,
+                    output_format=MULAW_8KHZ
+                ):
+                    audio_q.put_nowait(mulaw_chunk)
             except Exception as e2:
                 logger.error(f"Fallback TTS also failed: {e2}")
 
+        else:
+            # The websocket stream only ends normally once Cartesia sent done
+            # (errors and dropped sockets raise), so this is the whole prompt
+            if cache_key and chunks:
+                _prompt_audio_cache[cache_key] = b"".join(chunks)
+
+        finally:
+            audio_q.put_nowait(None)
+
     async def _speak(self, text: str):
         """Convert text to speech and send to Twilio (for greetings and errors)."""
         if not text:
@@ -208,37 +454,24 @@ class VoicePipeline:
 
         try:
             await self._speak_sentence(text)
+            await self._until_stopped(self._tts_pipeline_q.join())
         except Exception as e:
             logger.error(f"Error in TTS: {e}")
         finally:
             self._speaking = False
 
-    def _mulaw_to_linear(self, mulaw_data: bytes) -> bytes:
-        """Convert mulaw audio to linear PCM."""
-        import audioop
-        return audioop.ulaw2lin(mulaw_data, 2)
-
-    def _linear_to_mulaw(self, linear_data: bytes) -> bytes:
-        """Convert linear PCM to mulaw."""
-        import audioop
-        return audioop.lin2ulaw(linear_data, 2)
-
-    def _upsample_audio(self, audio: bytes, from_rate: int, to_rate: int) -> bytes:
-        """Upsample audio from one sample rate to another."""
-        import audioop
-        return audioop.ratecv(audio, 2, 1, from_rate, to_rate, None)[0]
-
-    def _downsample_audio(self, audio: bytes, from_rate: int, to_rate: int) -> bytes:
-        """Downsample audio from one sample rate to another."""
-        import audioop
-        return audioop.ratecv(audio, 2, 1, from_rate, to_rate, None)[0]
-
-    def _convert_for_twilio(self, audio_24khz: bytes) -> bytes:
-        """Convert 24kHz PCM audio to 8kHz mulaw for Twilio."""
-        # Downsample from 24kHz to 8kHz
-        audio_8khz = self._downsample_audio(audio_24khz, 24000, 8000)
-        # Convert to mulaw
-        return self._linear_to_mulaw(audio_8khz)
+    async def _send_tts_audio(self):
+        """Send synthesized audio to Twilio, one sentence at a time in order."""
+        while True:
+            audio_q = await self._tts_pipeline_q.get()
+            try:
+                while (audio := await audio_q.get()) is not None:
+                    try:
+                        await self.on_audio_output(audio)
+                    except Exception as e:
+                        logger.error(f"Error sending TTS audio: {e}")
+            finally:
+                self._tts_pipeline_q.task_done()
 
 
 class TwilioMediaStreamHandler:
@@ -247,12 +480,36 @@ class TwilioMediaStreamHandler:
     Manages bidirectional audio streaming between Twilio and the voice pipeline.
     """
 
+    __slots__ = (
+        "session_id", "pipeline", "stream_sid", "_media_prefix", "_clear_message",
+        "_playout_end", "_ws", "_stream_ready", "_event_handlers",
+    )
+
+    # Outbound audio may run this far (seconds) ahead of real-time playout
+    # at Twilio; past that, sends are paced against the playout deadline
+    PLAYOUT_LEAD = 1.0
+    # Outbound media payload size: 100ms of 8kHz mulaw. Twilio accepts
+    # payloads larger than its own 20ms inbound framing.
+    MEDIA_CHUNK_SIZE = 800
+
     def __init__(self, session_id: str):
         self.session_id = session_id
         self.pipeline: Optional[VoicePipeline] = None
         self.stream_sid: Optional[str] = None
+        # Outbound media frames differ only in payload; envelope built once per stream
+        self._media_prefix = ""
+        self._clear_message = ""
+        # Monotonic (loop.time()) instant at which audio sent so far finishes playing
+        self._playout_end = 0.0
         self._ws = None
         self._stream_ready = asyncio.Event()
+        # Twilio event name -> handler
+        self._event_handlers: dict[str, Callable[[dict], Awaitable[None]]] = {
+            "media": self._on_media,
+            "start": self._on_start,
+            "stop": self._on_stop,
+            "dtmf": self._on_dtmf,
+        }
 
     async def handle_websocket(self, websocket):
         """Handle the WebSocket connection from Twilio."""
@@ -268,7 +525,8 @@ class TwilioMediaStreamHandler:
         self.pipeline = VoicePipeline(
             session=session,
             on_audio_output=self._send_audio,
-            on_call_complete=self._on_call_complete
+            on_call_complete=self._on_call_complete,
+            wait_for_playout=self._wait_for_playout
         )
 
         try:
@@ -303,40 +561,50 @@ class TwilioMediaStreamHandler:
     async def _handle_message(self, message: str):
         """Handle incoming WebSocket message from Twilio."""
         try:
-            data = json.loads(message)
-            event_type = data.get("event")
-
-            if event_type == "start":
-                self.stream_sid = data.get("streamSid")
-                logger.info(f"Media stream started: {self.stream_sid}")
-                self._stream_ready.set()  # Signal that stream is ready
-
-            elif event_type == "media":
-                # Incoming audio from caller
-                payload = data.get("media", {}).get("payload", "")
-                if payload:
-                    audio_data = base64.b64decode(payload)
-                    if self.pipeline:
-                        await self.pipeline.process_audio_input(audio_data)
-
-            elif event_type == "stop":
-                logger.info(f"Media stream stopped: {self.stream_sid}")
-                if self.pipeline:
-                    await self.pipeline.stop()
-
-            elif event_type == "dtmf":
-                # Handle DTMF tones (keypress)
-                digit = data.get("dtmf", {}).get("digit")
-                if digit and self.pipeline and self.pipeline.agent:
-                    # Process DTMF as text input
-                    response, is_complete = await self.pipeline.agent.process_user_input(digit)
-                    await self.pipeline._speak(response)
-                    if is_complete:
-                        await self.pipeline.stop()
+            if message.startswith(_MEDIA_EVENT_PREFIX):
+                match = _MEDIA_PAYLOAD_RE.search(message, len(_MEDIA_EVENT_PREFIX))
+                if match:
+                    await self._handle_media_payload(match.group(1))
+                    return
+
+            data = orjson.loads(message)
+            handler = self._event_handlers.get(data.get("event"))
+            if handler:
+                await handler(data)
 
         except Exception as e:
             logger.error(f"Error handling message: {e}")
 
+    async def _on_start(self, data: dict):
+        self.stream_sid = data.get("streamSid")
+        sid_json = orjson.dumps(self.stream_sid).decode()
+        self._media_prefix = '{"event":"media","streamSid":' + sid_json + ',"media":{"payload":"'
+        self._clear_message = '{"event":"clear","streamSid":' + sid_json + '}'
+        logger.info(f"Media stream started: {self.stream_sid}")
+        self._stream_ready.set()  # Signal that stream is ready
+
+    async def _on_media(self, data: dict):
+        await self._handle_media_payload(data.get("media", {}).get("payload", ""))
+
+    async def _on_stop(self, data: dict):
+        logger.info(f"Media stream stopped: {self.stream_sid}")
+        if self.pipeline:
+            await self.pipeline.stop()
+
+    async def _on_dtmf(self, data: dict):
+        # Handle DTMF tones (keypress)
+        digit = data.get("dtmf", {}).get("digit")
+        if digit and self.pipeline and self.pipeline.agent:
+            # Process DTMF as text input, queued behind any spoken
+            # transcript and streamed to TTS the same way
+            self.pipeline.submit_input(digit)
+
+    async def _handle_media_payload(self, payload: str):
+        """Forward a base64 media payload (incoming caller audio) to the pipeline."""
+        # Check before decoding: audio is dropped anyway while the agent speaks
+        if payload and self.pipeline and self.pipeline.is_accepting_audio:
+            await self.pipeline.process_audio_input(binascii.a2b_base64(payload))
+
     async def _send_audio(self, audio_data: bytes):
         """Send audio to Twilio via WebSocket."""
         if not self._ws or not self.stream_sid:
@@ -344,28 +612,42 @@ class TwilioMediaStreamHandler:
             return
 
         # Twilio expects base64-encoded audio in chunks
-        # Use 160 bytes = 20ms of 8kHz mulaw audio (standard RTP packet size)
-        chunk_size = 160
+        chunk_size = self.MEDIA_CHUNK_SIZE
         chunks_sent = 0
 
-        for i in range(0, len(audio_data), chunk_size):
-            chunk = audio_data[i:i + chunk_size]
-            message = {
-                "event": "media",
-                "streamSid": self.stream_sid,
-                "media": {
-                    "payload": base64.b64encode(chunk).decode("utf-8")
-                }
-            }
+        prefix = self._media_prefix
+        b64encode = base64.b64encode
+        loop = asyncio.get_running_loop()
+        # Slicing a memoryview doesn't copy; b64encode reads it directly
+        audio_view = memoryview(audio_data)
+
+        for i in range(0, len(audio_view), chunk_size):
+            chunk = audio_view[i:i + chunk_size]
+            # Base64 needs no JSON escaping, so splice it into the envelope
+            message = prefix + b64encode(chunk).decode("ascii") + '"}}'
+
+            # Schedule against the absolute playout deadline rather than
+            # sleeping a fixed interval per chunk, so pacing never drifts
+            now = loop.time()
+            if self._playout_end < now:
+                self._playout_end = now
+            wait = self._playout_end - now - self.PLAYOUT_LEAD
+            if wait > 0:
+                await asyncio.sleep(wait)
+
             try:
-                await self._ws.send_text(json.dumps(message))
+                await self._ws.send_text(message)
                 chunks_sent += 1
             except Exception as e:
                 logger.error(f"Error sending audio chunk {chunks_sent}: {e}")
                 break
-            # Minimal delay - Twilio buffers on their end
-            if chunks_sent % 10 == 0:  # Yield every 10 chunks (~200ms)
-                await asyncio.sleep(0.001)
+            self._playout_end += len(chunk) / 8000  # 8kHz mulaw, 1 byte per sample
+
+    async def _wait_for_playout(self):
+        """Wait until the audio sent to Twilio so far has finished playing."""
+        remaining = self._playout_end - asyncio.get_running_loop().time()
+        if remaining > 0:
+            await asyncio.sleep(remaining)
 
     async def _on_call_complete(self):
         """Handle call completion and trigger Zappix flow."""
@@ -391,8 +673,6 @@ class TwilioMediaStreamHandler:
         if self._ws:
             # Send clear message to stop any pending audio
             if self.stream_sid:
-                await self._ws.send_text(json.dumps({
-                    "event": "clear",
-                    "streamSid": self.stream_sid
-                }))
+                await self._ws.send_text(self._clear_message)
+                self._playout_end = 0.0
 
@@ -59,6 +59,11 @@ class Settings(BaseSettings):
     smtp_user: str = "apikey"
     smtp_password: str = ""
     notification_email: str = "sales@zappix.com"
+    email_workers: int = 2
+
+    # Zappix
+    zappix_sms_rate: float = 1.0  # SMS sends per second
+    zappix_sms_burst: int = 5
 
 
 @lru_cache()
@@ -1,17 +1,36 @@
+import asyncio
+import atexit
 import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 
 from app.config import get_settings
 from app.routers import calls, twilio_webhooks, forms
 from app.services.session_manager import session_manager
+from app.services.cartesia_tts import cartesia_tts
+from app.services.deepgram_stt import deepgram_stt
+from app.services.email_service import email_service
+from app.services.twilio_service import twilio_service
+from app.services.zappix_service import zappix_service
+from app.agents.health_assessment_agent import get_openai_client, close_openai_client
 
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
     format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
 )
+# Records are written by a background thread; app code only enqueues
+# them, so a slow stdout/log driver never stalls the event loop
+_log_queue: queue.SimpleQueue = queue.SimpleQueue()
+_root_logger = logging.getLogger()
+_log_listener = QueueListener(_log_queue, *_root_logger.handlers, respect_handler_level=True)
+_root_logger.handlers = [QueueHandler(_log_queue)]
+_log_listener.start()
+atexit.register(_log_listener.stop)  # flushes what's still queued
 logger = logging.getLogger(__name__)
 
 
@@ -21,16 +40,34 @@ async def lifespan(app: FastAPI):
     logger.info("Starting Zappix Demo Backend...")
     settings = get_settings()
     logger.info(f"Environment: {settings.app_env}")
+    # Build the shared OpenAI client (and import the SDK) now rather than
+    # on the first call's path to its greeting
+    get_openai_client()
+    # Same for the pooled Cartesia/Deepgram HTTP clients
+    cartesia_tts.client
+    deepgram_stt.client
+    # Open the Twilio API connection in the background; startup doesn't wait
+    twilio_warmup = asyncio.create_task(twilio_service.warmup())
+    email_service.start()
+    twilio_webhooks.start_status_worker()
     yield
     logger.info("Shutting down Zappix Demo Backend...")
+    twilio_warmup.cancel()
+    await email_service.stop()
+    await twilio_webhooks.stop_status_worker()
     await session_manager.close()
+    await close_openai_client()
+    await cartesia_tts.close()
+    await deepgram_stt.close()
+    await zappix_service.close()
 
 
 app = FastAPI(
     title="Zappix + Aldea AI Demo",
     description="Conversational AI Health Assessment Demo with LiveKit, Twilio, Deepgram, Cartesia, and OpenAI",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 # Configure CORS (allow all origins for Twilio WebSocket connections)
@@ -71,6 +108,8 @@ if __name__ == "__main__":
         "app.main:app",
         host="0.0.0.0",
         port=8000,
+        loop="uvloop",
+        http="httptools",
         reload=settings.app_debug
     )
 
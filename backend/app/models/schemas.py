@@ -45,6 +45,7 @@ class CallSession(BaseModel):
     answers: HealthAssessmentAnswers = Field(default_factory=HealthAssessmentAnswers)
     cell_phone_for_sms: Optional[str] = None
     opted_in_for_sms: bool = False
+    sms_sent: bool = False
     call_completed: bool = False
     form_submitted: bool = False
     created_at: datetime = Field(default_factory=datetime.utcnow)
@@ -76,7 +76,7 @@ async def trigger_zappix_flow(session_id: str):
         phone_number = session.cell_phone_for_sms or session.phone_number
 
         # Create Zappix session and send SMS
-        success = await zappix_service.create_session_and_send_sms(session)
+        success = await zappix_service.create_session_and_send_sms(session, require_opt_in=False)
 
         if success:
             logger.info(f"Zappix flow triggered successfully for session {session_id}")
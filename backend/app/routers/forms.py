@@ -1,6 +1,9 @@
 import logging
-import base64
-from fastapi import APIRouter, HTTPException, BackgroundTasks
+import asyncio
+import binascii
+import orjson
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import ORJSONResponse
 from pydantic import BaseModel
 from typing import Optional
 from datetime import datetime
@@ -30,9 +33,37 @@ class FormDataResponse(BaseModel):
     call_completed: bool = False
 
 
-class FormSubmissionRequest(BaseModel):
-    """Request to submit a signed form."""
-    signature: str  # Base64 encoded signature image
+# Submissions are either a raw PNG body or JSON {"signature": "<data URL>"}
+_PNG_MAGIC = b"\x89PNG"
+
+
+# Display strings for stored answer values, by (value type, language)
+_DISPLAY_MAPS: dict[tuple[str, str], dict[str, str]] = {
+    ("health", "en"): {
+        "excellent": "Excellent",
+        "very_good": "Very Good",
+        "good": "Good",
+        "fair": "Fair",
+        "poor": "Poor"
+    },
+    ("health", "es"): {
+        "excellent": "Excelente",
+        "very_good": "Muy Buena",
+        "good": "Buena",
+        "fair": "Regular",
+        "poor": "Mala"
+    },
+    ("limitation", "en"): {
+        "limited_a_lot": "Limited a Lot",
+        "limited_a_little": "Limited a Little",
+        "not_limited": "Not Limited at All"
+    },
+    ("limitation", "es"): {
+        "limited_a_lot": "Muy Limitado",
+        "limited_a_little": "Poco Limitado",
+        "not_limited": "Sin Limitación"
+    },
+}
 
 
 def _get_display_value(value: Optional[str], value_type: str, language: str) -> Optional[str]:
@@ -40,44 +71,19 @@ def _get_display_value(value: Optional[str], value_type: str, language: str) ->
     if not value:
         return None
 
-    if value_type == "health":
-        display_map_en = {
-            "excellent": "Excellent",
-            "very_good": "Very Good",
-            "good": "Good",
-            "fair": "Fair",
-            "poor": "Poor"
-        }
-        display_map_es = {
-            "excellent": "Excelente",
-            "very_good": "Muy Buena",
-            "good": "Buena",
-            "fair": "Regular",
-            "poor": "Mala"
-        }
-        return display_map_es.get(value, value) if language == "es" else display_map_en.get(value, value)
-
-    elif value_type == "limitation":
-        display_map_en = {
-            "limited_a_lot": "Limited a Lot",
-            "limited_a_little": "Limited a Little",
-            "not_limited": "Not Limited at All"
-        }
-        display_map_es = {
-            "limited_a_lot": "Muy Limitado",
-            "limited_a_little": "Poco Limitado",
-            "not_limited": "Sin Limitación"
-        }
-        return display_map_es.get(value, value) if language == "es" else display_map_en.get(value, value)
-
-    return value
-
-
-@router.get("/{session_id}", response_model=FormDataResponse)
+    display_map = _DISPLAY_MAPS.get((value_type, "es" if language == "es" else "en"))
+    if display_map is None:
+        return value
+    return display_map.get(value, value)
+
+
+@router.get("/{session_id}", responses={200: {"model": FormDataResponse}})
 async def get_form_data(session_id: str):
     """
     Get pre-populated form data for a session.
     This is called when the user clicks the SMS link.
+    The data comes from our own session store, so it is serialized
+    directly rather than validated through FormDataResponse.
     """
     session = await session_manager.get_session(session_id)
     if not session:
@@ -85,81 +91,89 @@ async def get_form_data(session_id: str):
 
     language = session.language.value
 
-    return FormDataResponse(
-        session_id=session.session_id,
-        first_name=session.first_name,
-        language=language,
-        date_of_birth=session.authentication.date_of_birth,
-        zip_code=session.authentication.zip_code,
-        general_health=session.answers.general_health,
-        general_health_display=_get_display_value(
+    return ORJSONResponse({
+        "session_id": session.session_id,
+        "first_name": session.first_name,
+        "language": language,
+        "date_of_birth": session.authentication.date_of_birth,
+        "zip_code": session.authentication.zip_code,
+        "general_health": session.answers.general_health,
+        "general_health_display": _get_display_value(
             session.answers.general_health, "health", language
         ),
-        moderate_activities_limitation=session.answers.moderate_activities_limitation,
-        moderate_activities_display=_get_display_value(
+        "moderate_activities_limitation": session.answers.moderate_activities_limitation,
+        "moderate_activities_display": _get_display_value(
             session.answers.moderate_activities_limitation, "limitation", language
         ),
-        climbing_stairs_limitation=session.answers.climbing_stairs_limitation,
-        climbing_stairs_display=_get_display_value(
+        "climbing_stairs_limitation": session.answers.climbing_stairs_limitation,
+        "climbing_stairs_display": _get_display_value(
             session.answers.climbing_stairs_limitation, "limitation", language
         ),
-        call_completed=session.call_completed
-    )
+        "call_completed": session.call_completed
+    })
 
 
 @router.post("/{session_id}/submit")
-async def submit_form(
-    session_id: str,
-    request: FormSubmissionRequest,
-    background_tasks: BackgroundTasks
-):
+async def submit_form(session_id: str, request: Request):
     """
     Submit the signed form.
     This sends the completed form to the notification email.
+    The body is read directly rather than through a pydantic model: either
+    the signature PNG itself, or JSON with a base64 data URL.
     """
+    body = await request.body()
+    signature = None
+    if not body.startswith(_PNG_MAGIC):
+        try:
+            signature = orjson.loads(body)["signature"]
+        except (orjson.JSONDecodeError, TypeError, KeyError):
+            signature = None
+        if not isinstance(signature, str):
+            raise HTTPException(status_code=422, detail="Expected a PNG body or JSON with a signature")
+
     session = await session_manager.get_session(session_id)
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
 
-    if session.form_submitted:
+    if signature is None:
+        signature_bytes = body
+    else:
+        # Decode signature (a data URL that can run to hundreds of KB, so
+        # off the event loop)
+        payload = signature.rsplit(",", 1)[-1]
+        try:
+            signature_bytes = await asyncio.to_thread(binascii.a2b_base64, payload)
+        except ValueError:  # binascii.Error, or non-ASCII input
+            signature_bytes = None
+
+    # Claim the submission before sending anything, so a double submit
+    # can't send the email twice
+    submitted = await session_manager.mark_form_submitted(session_id)
+    if submitted is None:
+        raise HTTPException(status_code=404, detail="Session not found")
+    if not submitted:
         raise HTTPException(status_code=400, detail="Form already submitted")
 
-    # Decode signature
-    try:
-        signature_bytes = base64.b64decode(request.signature.split(",")[-1])
-    except Exception:
-        signature_bytes = None
-
-    # Mark form as submitted
-    await session_manager.mark_form_submitted(session_id)
-
-    # Send email in background
-    background_tasks.add_task(
-        email_service.send_completed_form,
-        session,
-        signature_bytes
-    )
+    if not await email_service.enqueue_completed_form(session, signature_bytes):
+        # Release the claim so the caller can resubmit once the queue drains
+        await session_manager.clear_form_submitted(session_id)
+        raise HTTPException(status_code=503, detail="Form could not be processed, please try again")
 
     logger.info(f"Form submitted for session {session_id}")
 
-    return {
+    return ORJSONResponse({
         "success": True,
         "message": "Form submitted successfully",
         "session_id": session_id
-    }
+    })
 
 
 @router.get("/{session_id}/status")
 async def get_form_status(session_id: str):
     """Get the current status of a form submission."""
-    session = await session_manager.get_session(session_id)
-    if not session:
+    # Polled by the waiting page; only the flags are decoded
+    flags = await session_manager.get_status_flags(session_id)
+    if flags is None:
         raise HTTPException(status_code=404, detail="Session not found")
 
-    return {
-        "session_id": session_id,
-        "call_completed": session.call_completed,
-        "form_submitted": session.form_submitted,
-        "opted_in_for_sms": session.opted_in_for_sms
-    }
-
+    return ORJSONResponse({"session_id": session_id, **flags})
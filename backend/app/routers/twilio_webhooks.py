@@ -1,4 +1,6 @@
 import logging
+import asyncio
+from typing import Optional
 from fastapi import APIRouter, Request, WebSocket, Form
 from fastapi.responses import Response
 
@@ -6,12 +8,84 @@ from app.config import get_settings
 from app.services.twilio_service import twilio_service
 from app.services.zappix_service import zappix_service
 from app.services.session_manager import session_manager
+from app.services.cartesia_tts import cartesia_tts
 from app.agents.voice_pipeline import TwilioMediaStreamHandler
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/twilio", tags=["twilio"])
 
+_ERROR_TWIML = b"<Response><Say>Sorry, there was an error. Goodbye.</Say></Response>"
+
+# "completed" status callbacks are queued and handled in batches: sessions
+# collected over a short window are marked completed in one Redis round-trip
+# and their SMS flows run concurrently
+COMPLETED_BATCH_WINDOW = 0.1
+COMPLETED_BATCH_MAX = 100
+
+_completed_q: asyncio.Queue[str] = asyncio.Queue()
+_completed_task: Optional[asyncio.Task] = None
+
+
+def start_status_worker():
+    """Start the completed-call worker (called from the app lifespan)."""
+    global _completed_task
+    if _completed_task is None:
+        _completed_task = asyncio.create_task(_process_completed_calls())
+
+
+async def stop_status_worker(drain_timeout: float = 5.0):
+    """Finish queued completed calls, then stop the worker."""
+    global _completed_task
+    if _completed_task is None:
+        return
+    try:
+        await asyncio.wait_for(_completed_q.join(), timeout=drain_timeout)
+    except asyncio.TimeoutError:
+        logger.warning(f"Stopping status worker with {_completed_q.qsize()} calls unprocessed")
+    _completed_task.cancel()
+    try:
+        await _completed_task
+    except asyncio.CancelledError:
+        pass
+    _completed_task = None
+
+
+async def _process_completed_calls():
+    """Drain completed calls in batches of up to COMPLETED_BATCH_MAX."""
+    loop = asyncio.get_running_loop()
+    while True:
+        session_ids = [await _completed_q.get()]
+        deadline = loop.time() + COMPLETED_BATCH_WINDOW
+        while len(session_ids) < COMPLETED_BATCH_MAX:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                session_ids.append(await asyncio.wait_for(_completed_q.get(), timeout=timeout))
+            except asyncio.TimeoutError:
+                break
+
+        try:
+            # Twilio may retry a callback; each session is handled once per batch
+            sessions = await session_manager.mark_calls_completed(list(dict.fromkeys(session_ids)))
+            opted_in = [
+                session for session in sessions
+                if session.opted_in_for_sms and session.cell_phone_for_sms
+            ]
+            if opted_in:
+                results = await zappix_service.create_sessions_and_send_sms_bulk(opted_in)
+                for session, success in zip(opted_in, results):
+                    if success:
+                        logger.info(f"Zappix session created and SMS sent for session {session.session_id}")
+                    else:
+                        logger.error(f"Zappix flow failed for session {session.session_id}")
+        except Exception as e:
+            logger.error(f"Failed to process completed calls {session_ids}: {e}")
+        finally:
+            for _ in session_ids:
+                _completed_q.task_done()
+
 
 @router.post("/voice/{session_id}")
 async def handle_voice_webhook(session_id: str, request: Request):
@@ -21,14 +95,10 @@ async def handle_voice_webhook(session_id: str, request: Request):
     """
     logger.info(f"Voice webhook called for session {session_id}")
 
-    # Get session to verify it exists
-    session = await session_manager.get_session(session_id)
-    if not session:
+    # Verify the session exists
+    if not await session_manager.exists(session_id):
         logger.error(f"Session not found: {session_id}")
-        return Response(
-            content="<Response><Say>Sorry, there was an error. Goodbye.</Say></Response>",
-            media_type="application/xml"
-        )
+        return Response(content=_ERROR_TWIML, media_type="application/xml")
 
     # Generate TwiML to start media stream
     twiml = twilio_service.generate_media_stream_twiml(session_id)
@@ -50,20 +120,8 @@ async def handle_status_callback(
     logger.info(f"Status callback for session {session_id}: {CallStatus}")
 
     if CallStatus == "completed":
-        session = await session_manager.get_session(session_id)
-        if session:
-            await session_manager.mark_call_completed(session_id)
-
-            # Create Zappix session and send SMS if user opted in
-            if session.opted_in_for_sms and session.cell_phone_for_sms:
-                try:
-                    success = await zappix_service.create_session_and_send_sms(session)
-                    if success:
-                        logger.info(f"Zappix session created and SMS sent for session {session_id}")
-                    else:
-                        logger.error(f"Zappix flow failed for session {session_id}")
-                except Exception as e:
-                    logger.error(f"Failed to process Zappix flow: {e}")
+        await cartesia_tts.close_ws(session_id)
+        _completed_q.put_nowait(session_id)
 
     return {"status": "ok"}
 
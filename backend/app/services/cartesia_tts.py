@@ -1,26 +1,60 @@
 import httpx
 import logging
 import asyncio
-from typing import AsyncGenerator, Optional
-import base64
-import json
+from typing import AsyncGenerator, Optional, Union
+import binascii
+import uuid
+import orjson
+import websockets
 
 from app.config import get_settings
 from app.models.schemas import Language
 
 logger = logging.getLogger(__name__)
 
+# Output formats: raw 16-bit PCM at 24kHz, and 8kHz mu-law as Twilio
+# Media Streams expect it (no conversion needed on our side)
+PCM_24KHZ = {"container": "raw", "encoding": "pcm_s16le", "sample_rate": 24000}
+MULAW_8KHZ = {"container": "raw", "encoding": "pcm_mulaw", "sample_rate": 8000}
+
 
 class CartesiaTTS:
     """Text-to-Speech service using Cartesia API."""
 
     def __init__(self):
         # Don't cache settings at init time - read them lazily
-        pass
+        self._client: Optional[httpx.AsyncClient] = None
+        # One persistent TTS WebSocket per call session
+        self._ws_sessions: dict[str, CartesiaStreamingSession] = {}
+        self._http_headers: Optional[dict[str, str]] = None
+        # Serialized request fields that only vary by language and format
+        self._body_prefixes: dict[tuple, bytes] = {}
     
     @property
     def base_url(self) -> str:
         return get_settings().cartesia_base_url
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Long-lived HTTP client so each utterance reuses a warm connection."""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                http2=True,
+                # HTTP/2 multiplexes requests over a few sockets; cap them so a
+                # burst of calls can't open a TLS connection each
+                limits=httpx.Limits(max_connections=20, max_keepalive_connections=20, keepalive_expiry=60.0),
+                timeout=httpx.Timeout(30.0, connect=5.0),
+            )
+        return self._client
+
+    async def close(self):
+        """Close the shared HTTP client and any open TTS WebSockets."""
+        for session_id in list(self._ws_sessions):
+            await self.close_ws(session_id)
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
     
     @property
     def api_key(self) -> str:
@@ -33,145 +67,249 @@ class CartesiaTTS:
             return settings.cartesia_voice_id_spanish
         return settings.cartesia_voice_id
 
+    @property
+    def http_headers(self) -> dict[str, str]:
+        if self._http_headers is None:
+            self._http_headers = {
+                "X-API-Key": self.api_key,
+                "Cartesia-Version": "2025-04-16",
+                "Content-Type": "application/json"
+            }
+        return self._http_headers
+
+    def _body_prefix(self, language: Language, output_format: dict, websocket: bool = False) -> bytes:
+        """
+        JSON request body without its closing brace, for the fields that are
+        fixed per (language, output format). Per-utterance fields are appended.
+        """
+        key = (language, tuple(output_format.items()), websocket)
+        prefix = self._body_prefixes.get(key)
+        if prefix is None:
+            body = {
+                "model_id": "sonic-english" if language == Language.ENGLISH else "sonic-multilingual",
+                "voice": {
+                    "mode": "id",
+                    "id": self.get_voice_id(language)
+                },
+                "output_format": output_format
+            }
+            if websocket:
+                body["add_timestamps"] = False
+            prefix = orjson.dumps(body)[:-1]
+            self._body_prefixes[key] = prefix
+        return prefix
+
+    def _request_body(self, text: str, language: Language, output_format: dict) -> bytes:
+        """Serialized HTTP request body for one utterance."""
+        return self._body_prefix(language, output_format) + b',"transcript":' + orjson.dumps(text) + b"}"
+
     async def synthesize(
         self,
         text: str,
-        language: Language = Language.ENGLISH
+        language: Language = Language.ENGLISH,
+        output_format: dict = MULAW_8KHZ
     ) -> bytes:
         """
         Synthesize text to speech using Cartesia.
-        Returns raw audio bytes (PCM 16-bit, 24kHz).
+        Returns raw audio bytes in output_format (8kHz mulaw by default).
         """
-        voice_id = self.get_voice_id(language)
-
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{self.base_url}/tts/bytes",
-                headers={
-                    "X-API-Key": self.api_key,
-                    "Cartesia-Version": "2025-04-16",
-                    "Content-Type": "application/json"
-                },
-                json={
-                    "model_id": "sonic-english" if language == Language.ENGLISH else "sonic-multilingual",
-                    "transcript": text,
-                    "voice": {
-                        "mode": "id",
-                        "id": voice_id
-                    },
-                    "output_format": {
-                        "container": "raw",
-                        "encoding": "pcm_s16le",
-                        "sample_rate": 24000
-                    }
-                },
-                timeout=30.0
-            )
+        response = await self.client.post(
+            "/tts/bytes",
+            headers=self.http_headers,
+            content=self._request_body(text, language, output_format),
+            timeout=30.0
+        )
 
-            if response.status_code != 200:
-                logger.error(f"Cartesia TTS error: {response.status_code} - {response.text}")
-                raise Exception(f"Cartesia TTS failed: {response.status_code}")
+        if response.status_code != 200:
+            logger.error(f"Cartesia TTS error: {response.status_code} - {response.text}")
+            raise Exception(f"Cartesia TTS failed: {response.status_code}")
 
-            return response.content
+        return response.content
 
     async def synthesize_stream(
         self,
         text: str,
-        language: Language = Language.ENGLISH
+        language: Language = Language.ENGLISH,
+        output_format: dict = MULAW_8KHZ
     ) -> AsyncGenerator[bytes, None]:
         """
         Synthesize text to speech with streaming output.
-        Yields audio chunks as they become available.
+        Yields audio chunks (in output_format) as they become available.
+        The bytes endpoint streams raw audio, so chunks need no JSON or
+        base64 decoding (unlike /tts/sse).
         """
-        voice_id = self.get_voice_id(language)
-
-        async with httpx.AsyncClient() as client:
-            async with client.stream(
-                "POST",
-                f"{self.base_url}/tts/sse",
-                headers={
-                    "X-API-Key": self.api_key,
-                    "Cartesia-Version": "2025-04-16",
-                    "Content-Type": "application/json"
-                },
-                json={
-                    "model_id": "sonic-english" if language == Language.ENGLISH else "sonic-multilingual",
-                    "transcript": text,
-                    "voice": {
-                        "mode": "id",
-                        "id": voice_id
-                    },
-                    "output_format": {
-                        "container": "raw",
-                        "encoding": "pcm_s16le",
-                        "sample_rate": 24000
-                    }
-                },
-                timeout=60.0
-            ) as response:
-                if response.status_code != 200:
-                    error_text = await response.aread()
-                    logger.error(f"Cartesia TTS stream error: {response.status_code} - {error_text}")
-                    raise Exception(f"Cartesia TTS stream failed: {response.status_code}")
-
-                async for line in response.aiter_lines():
-                    if line.startswith("data:"):
-                        try:
-                            data = json.loads(line[5:].strip())
-                            if "audio" in data:
-                                yield base64.b64decode(data["audio"])
-                        except json.JSONDecodeError:
-                            continue
+        async with self.client.stream(
+            "POST",
+            "/tts/bytes",
+            headers=self.http_headers,
+            content=self._request_body(text, language, output_format),
+            timeout=60.0
+        ) as response:
+            if response.status_code != 200:
+                error_text = await response.aread()
+                logger.error(f"Cartesia TTS stream error: {response.status_code} - {error_text}")
+                raise Exception(f"Cartesia TTS stream failed: {response.status_code}")
+
+            async for chunk in response.aiter_bytes():
+                yield chunk
+
+    @property
+    def ws_url(self) -> str:
+        return self.base_url.replace("https://", "wss://").replace("http://", "ws://")
+
+    async def ensure_ws(self, session_id: str) -> "CartesiaStreamingSession":
+        """
+        Get the WebSocket for a call session, dialing it on first use.
+        The socket stays open across turns until close_ws() is called.
+        """
+        ws_session = self._ws_sessions.get(session_id)
+        if ws_session is None:
+            ws_session = CartesiaStreamingSession(url=f"{self.ws_url}/tts/websocket", api_key=self.api_key)
+            self._ws_sessions[session_id] = ws_session
+        await ws_session.connect()
+        return ws_session
+
+    async def close_ws(self, session_id: str):
+        """Close the WebSocket held for a call session, if any."""
+        ws_session = self._ws_sessions.pop(session_id, None)
+        if ws_session:
+            await ws_session.close()
 
     async def synthesize_websocket(
         self,
         text: str,
+        session_id: str,
         language: Language = Language.ENGLISH,
-        context_id: Optional[str] = None
+        output_format: dict = MULAW_8KHZ
     ) -> AsyncGenerator[bytes, None]:
         """
         Synthesize using WebSocket for lowest latency streaming.
+        Reuses the call session's open socket; each utterance gets its own context.
         """
-        import websockets
+        ws_session = await self.ensure_ws(session_id)
 
-        voice_id = self.get_voice_id(language)
-        ws_url = self.base_url.replace("https://", "wss://").replace("http://", "ws://")
+        body_prefix = self._body_prefix(language, output_format, websocket=True)
+        async for chunk in ws_session.synthesize(body_prefix, text):
+            yield chunk
 
-        async with websockets.connect(
-            f"{ws_url}/tts/websocket",
-            additional_headers={
-                "X-API-Key": self.api_key,
-                "Cartesia-Version": "2025-04-16"
-            }
-        ) as ws:
-            # Send synthesis request
-            await ws.send(json.dumps({
-                "model_id": "sonic-english" if language == Language.ENGLISH else "sonic-multilingual",
-                "transcript": text,
-                "voice": {
-                    "mode": "id",
-                    "id": voice_id
-                },
-                "output_format": {
-                    "container": "raw",
-                    "encoding": "pcm_s16le",
-                    "sample_rate": 24000
-                },
-                "context_id": context_id
-            }))
-
-            # Receive audio chunks
-            while True:
-                try:
-                    message = await asyncio.wait_for(ws.recv(), timeout=30.0)
-                    data = json.loads(message)
-
-                    if data.get("type") == "audio":
-                        yield base64.b64decode(data["data"])
-                    elif data.get("type") == "done":
-                        break
-                except asyncio.TimeoutError:
-                    break
+
+class CartesiaStreamingSession:
+    """
+    A persistent Cartesia TTS WebSocket for one call.
+    Several utterances may be in flight at once; responses are routed
+    back to each one by context_id.
+    """
+
+    CONNECT_TIMEOUT = 5.0
+
+    def __init__(self, url: str, api_key: str):
+        self.url = url
+        self.api_key = api_key
+        self.ws: Optional[websockets.WebSocketClientProtocol] = None
+        self._receive_task: Optional[asyncio.Task] = None
+        self._connect_lock = asyncio.Lock()
+        # context_id -> queue of decoded audio chunks, ended by None once
+        # Cartesia reports done, or by an exception if the utterance failed
+        self._contexts: dict[str, asyncio.Queue[Union[bytes, Exception, None]]] = {}
+
+    @property
+    def is_connected(self) -> bool:
+        return self._receive_task is not None and not self._receive_task.done()
+
+    async def connect(self):
+        """Dial the socket unless it is already open."""
+        async with self._connect_lock:
+            if self.is_connected:
+                return
+
+            self.ws = await asyncio.wait_for(
+                websockets.connect(
+                    self.url,
+                    additional_headers={
+                        "X-API-Key": self.api_key,
+                        "Cartesia-Version": "2025-04-16"
+                    },
+                    ping_interval=5,
+                    ping_timeout=20,
+                    close_timeout=1,
+                ),
+                timeout=self.CONNECT_TIMEOUT
+            )
+            self._receive_task = asyncio.create_task(self._receive_loop())
+            logger.info("Connected to Cartesia TTS websocket")
+
+    async def _receive_loop(self):
+        """Route incoming audio to the context it belongs to."""
+        try:
+            async for message in self.ws:
+                data = orjson.loads(message)
+                audio_q = self._contexts.get(data.get("context_id"))
+                if audio_q is None:
+                    continue
+
+                msg_type = data.get("type")
+                if msg_type in ("chunk", "audio"):
+                    audio_q.put_nowait(binascii.a2b_base64(data["data"]))
+                    if data.get("done"):
+                        audio_q.put_nowait(None)
+                elif msg_type == "done":
+                    audio_q.put_nowait(None)
+                elif msg_type == "error":
+                    logger.error(f"Cartesia TTS websocket error: {data.get('error')}")
+                    audio_q.put_nowait(Exception(f"Cartesia TTS websocket error: {data.get('error')}"))
+        except websockets.exceptions.ConnectionClosed:
+            logger.info("Cartesia TTS websocket closed")
+        except Exception as e:
+            logger.error(f"Error in Cartesia receive loop: {e}")
+            # The next connect() dials a new socket; don't leave this one open
+            try:
+                await self.ws.close()
+            except Exception:
+                pass
+        finally:
+            # Fail anything still waiting on this socket
+            for audio_q in self._contexts.values():
+                audio_q.put_nowait(ConnectionError("Cartesia TTS websocket closed mid-utterance"))
+
+    async def synthesize(self, body_prefix: bytes, text: str) -> AsyncGenerator[bytes, None]:
+        """
+        Send one transcript and yield its audio until Cartesia reports done.
+        Raises if Cartesia reports an error or the socket drops first.
+        body_prefix is the serialized request minus its closing brace.
+        """
+        context_id = uuid.uuid4().hex
+        audio_q: asyncio.Queue[Optional[bytes]] = asyncio.Queue()
+        self._contexts[context_id] = audio_q
+
+        message = b"".join((
+            body_prefix,
+            b',"context_id":"', context_id.encode(), b'","transcript":', orjson.dumps(text), b"}"
+        ))
+        try:
+            await self.ws.send(message.decode())
+            while (chunk := await audio_q.get()) is not None:
+                if isinstance(chunk, Exception):
+                    raise chunk
+                yield chunk
+        finally:
+            self._contexts.pop(context_id, None)
+
+    async def close(self):
+        """Close the socket and stop the receive loop."""
+        if self.ws:
+            try:
+                await self.ws.close()
+            except Exception:
+                pass
+            self.ws = None
+
+        if self._receive_task:
+            self._receive_task.cancel()
+            try:
+                await self._receive_task
+            except asyncio.CancelledError:
+                pass
+            self._receive_task = None
 
 
 # Singleton instance
@@ -1,8 +1,10 @@
 import httpx
 import logging
 import asyncio
+from functools import lru_cache
 from typing import Optional, Callable
 import json
+import orjson
 import websockets
 
 from app.config import get_settings
@@ -10,17 +12,68 @@ from app.models.schemas import Language
 
 logger = logging.getLogger(__name__)
 
+# Transcripts are the only messages we act on; anything else (metadata,
+# speech-started, utterance-end) is skipped without being parsed
+_RESULTS_MARKER = '"Results"'
+_RESULTS_MARKER_BYTES = b'"Results"'
+
+
+@lru_cache(maxsize=None)
+def _streaming_query(language: Language) -> str:
+    """Query string for a streaming connection (mulaw 8k from Twilio), built once per language."""
+    # Simplified parameters - use specific language instead of detect_language
+    lang_code = "es" if language == Language.SPANISH else "en-US"
+    return "&".join([
+        "model=nova-2",
+        f"language={lang_code}",
+        "punctuate=true",
+        "interim_results=true",
+        "endpointing=300",
+        "encoding=mulaw",
+        "sample_rate=8000",
+        "channels=1",
+    ])
+
+
+@lru_cache(maxsize=8)
+def _auth_headers(api_key: str, content_type: Optional[str] = None) -> dict[str, str]:
+    """Request headers for an API key; shared, so never mutate the result."""
+    headers = {"Authorization": f"Token {api_key}"}
+    if content_type:
+        headers["Content-Type"] = content_type
+    return headers
+
 
 class DeepgramSTT:
     """Speech-to-Text service using Deepgram API."""
 
     def __init__(self):
         # Don't cache settings at init time - read them lazily
-        pass
+        self._client: Optional[httpx.AsyncClient] = None
     
     @property
     def base_url(self) -> str:
         return get_settings().deepgram_base_url
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """Long-lived HTTP client so each request reuses a warm connection."""
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                base_url=self.base_url,
+                http2=True,
+                # HTTP/2 multiplexes requests over a few sockets; cap them so a
+                # burst of calls can't open a TLS connection each
+                limits=httpx.Limits(max_connections=20, max_keepalive_connections=20, keepalive_expiry=60.0),
+                timeout=httpx.Timeout(30.0, connect=5.0),
+            )
+        return self._client
+
+    async def close(self):
+        """Close the shared HTTP client."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
     
     @property
     def api_key(self) -> str:
@@ -37,11 +90,14 @@ class DeepgramSTT:
         self,
         audio_data: bytes,
         language: Language = Language.ENGLISH,
-        detect_language: bool = False
+        detect_language: bool = False,
+        encoding: Optional[str] = None,
+        sample_rate: Optional[int] = None
     ) -> dict:
         """
         Transcribe audio using Deepgram.
         Returns transcription result with text and metadata.
+        Passing encoding and sample_rate spares Deepgram sniffing the format.
         """
         params = {
             "model": "nova-2",
@@ -54,26 +110,24 @@ class DeepgramSTT:
         else:
             params["language"] = self.get_language_code(language)
 
-        base_url = self.base_url
-        api_key = self.api_key
-        
-        async with httpx.AsyncClient() as client:
-            response = await client.post(
-                f"{base_url}/v1/listen",
-                headers={
-                    "Authorization": f"Token {api_key}",
-                    "Content-Type": "audio/raw"
-                },
-                params=params,
-                content=audio_data,
-                timeout=30.0
-            )
+        if encoding:
+            params["encoding"] = encoding
+        if sample_rate:
+            params["sample_rate"] = str(sample_rate)
+
+        response = await self.client.post(
+            "/v1/listen",
+            headers=_auth_headers(self.api_key, "audio/raw"),
+            params=params,
+            content=audio_data,
+            timeout=30.0
+        )
 
-            if response.status_code != 200:
-                logger.error(f"Deepgram STT error: {response.status_code} - {response.text}")
-                raise Exception(f"Deepgram STT failed: {response.status_code}")
+        if response.status_code != 200:
+            logger.error(f"Deepgram STT error: {response.status_code} - {response.text}")
+            raise Exception(f"Deepgram STT failed: {response.status_code}")
 
-            return response.json()
+        return response.json()
 
     async def create_streaming_connection(
         self,
@@ -116,21 +170,7 @@ class DeepgramStreamingSession:
 
     async def connect(self):
         """Establish WebSocket connection to Deepgram."""
-        # Simplified parameters - use specific language instead of detect_language
-        lang_code = "es" if self.language == Language.SPANISH else "en-US"
-        
-        params = [
-            "model=nova-2",
-            f"language={lang_code}",
-            "punctuate=true",
-            "interim_results=true",
-            "endpointing=300",
-            "encoding=mulaw",
-            "sample_rate=8000",
-            "channels=1",
-        ]
-
-        url = f"{self.base_url}/v1/listen?{'&'.join(params)}"
+        url = f"{self.base_url}/v1/listen?{_streaming_query(self.language)}"
         
         logger.info(f"Attempting Deepgram connection to: {url}")
         logger.info(f"API key present: {bool(self.api_key)}, length: {len(self.api_key) if self.api_key else 0}")
@@ -138,9 +178,10 @@ class DeepgramStreamingSession:
         try:
             self.ws = await websockets.connect(
                 url,
-                additional_headers={"Authorization": f"Token {self.api_key}"},
-                ping_interval=20,
-                ping_timeout=10,
+                additional_headers=_auth_headers(self.api_key),
+                ping_interval=10,
+                ping_timeout=20,
+                close_timeout=1,
             )
 
             self._running = True
@@ -160,10 +201,19 @@ class DeepgramStreamingSession:
 
     async def _receive_loop(self):
         """Background task to receive transcripts from Deepgram."""
-        while self._running and self.ws:
-            try:
-                message = await asyncio.wait_for(self.ws.recv(), timeout=30.0)
-                data = json.loads(message)
+        # The library answers and sends pings itself; Deepgram's own idle
+        # timeout is handled by the pipeline's KeepAlive messages
+        try:
+            async for message in self.ws:
+                if not self._running:
+                    break
+                marker = _RESULTS_MARKER if isinstance(message, str) else _RESULTS_MARKER_BYTES
+                if marker not in message:
+                    continue
+                try:
+                    data = orjson.loads(message)
+                except orjson.JSONDecodeError:
+                    continue
 
                 if data.get("type") == "Results":
                     channel = data.get("channel", {})
@@ -177,19 +227,10 @@ class DeepgramStreamingSession:
                         if transcript and self.on_transcript:
                             self.on_transcript(transcript, is_final, detected_lang)
 
-            except asyncio.TimeoutError:
-                # Send keepalive
-                if self.ws:
-                    try:
-                        await self.ws.send(json.dumps({"type": "KeepAlive"}))
-                    except:
-                        pass
-            except websockets.exceptions.ConnectionClosed:
-                logger.info("Deepgram connection closed")
-                break
-            except Exception as e:
-                logger.error(f"Error in Deepgram receive loop: {e}")
-                break
+        except websockets.exceptions.ConnectionClosed:
+            logger.info("Deepgram connection closed")
+        except Exception as e:
+            logger.error(f"Error in Deepgram receive loop: {e}")
 
     async def send_audio(self, audio_data: bytes):
         """Send audio data to Deepgram for transcription."""
@@ -199,6 +240,14 @@ class DeepgramStreamingSession:
             except Exception as e:
                 logger.error(f"Error sending audio to Deepgram: {e}")
 
+    async def send_keepalive(self):
+        """Keep the stream open while no audio is being sent."""
+        if self.ws and self._connected:
+            try:
+                await self.ws.send(json.dumps({"type": "KeepAlive"}))
+            except Exception as e:
+                logger.error(f"Error sending keepalive to Deepgram: {e}")
+
     async def close(self):
         """Close the Deepgram connection."""
         self._running = False
@@ -1,190 +1,320 @@
-import smtplib
+import asyncio
+import aiosmtplib
 import logging
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from email.mime.base import MIMEBase
-from email import encoders
-from typing import Optional
+import base64
+from email.header import Header
+from typing import Optional, Tuple
 import io
+from jinja2 import Environment
 
 from app.config import get_settings
 from app.models.schemas import CallSession, Language
 
 logger = logging.getLogger(__name__)
 
+# The form email is always HTML plus an optional PNG, so its wire format is
+# assembled from these pieces instead of serializing an EmailMessage tree.
+# "_" never occurs in base64, so the boundary can't collide with a part.
+_SENDER = "noreply@aldea.ai"
+_BOUNDARY = b"zappix_form_boundary"
+_HTML_PART_HEADERS = (
+    b'Content-Type: text/html; charset="utf-8"\r\n'
+    b"Content-Transfer-Encoding: base64\r\n\r\n"
+)
+_PNG_PART_HEADERS = (
+    b"Content-Type: image/png\r\n"
+    b"Content-Transfer-Encoding: base64\r\n"
+    b'Content-Disposition: attachment; filename="signature_%s.png"\r\n\r\n'
+)
+
+
+def _minify_html(source: str) -> str:
+    """
+    Drop indentation and line breaks from a template source. Only safe for
+    markup where every line is a whole tag or CSS declaration, as below.
+    """
+    return "".join(line.strip() for line in source.splitlines())
+
+
+# Form email, compiled once at import (minified, so every message is
+# smaller on the wire); autoescaping covers caller-provided values
+_FORM_TEMPLATE = Environment(autoescape=True).from_string(_minify_html("""\
+<!DOCTYPE html>
+<html>
+<head>
+    <style>
+        body {
+            font-family: Arial, sans-serif;
+            line-height: 1.6;
+            color: #333;
+            max-width: 600px;
+            margin: 0 auto;
+            padding: 20px;
+        }
+        .header {
+            background: linear-gradient(135deg, #1a365d 0%, #2d5a87 100%);
+            color: white;
+            padding: 20px;
+            border-radius: 8px 8px 0 0;
+            text-align: center;
+        }
+        .content {
+            background: #f8f9fa;
+            padding: 20px;
+            border: 1px solid #e9ecef;
+        }
+        .field {
+            margin-bottom: 15px;
+            padding: 10px;
+            background: white;
+            border-radius: 4px;
+            border-left: 4px solid #2d5a87;
+        }
+        .label {
+            font-weight: bold;
+            color: #1a365d;
+            font-size: 12px;
+            text-transform: uppercase;
+        }
+        .value {
+            font-size: 16px;
+            margin-top: 5px;
+        }
+        .footer {
+            background: #1a365d;
+            color: white;
+            padding: 15px;
+            text-align: center;
+            font-size: 12px;
+            border-radius: 0 0 8px 8px;
+        }
+        .signature-box {
+            border: 2px dashed #2d5a87;
+            padding: 20px;
+            text-align: center;
+            background: white;
+            margin-top: 10px;
+        }
+    </style>
+</head>
+<body>
+    <div class="header">
+        <h1>{{ title }}</h1>
+        <p>Zappix + Aldea AI Demo</p>
+    </div>
+    <div class="content">
+        <div class="field">
+            <div class="label">{{ labels.name }}</div>
+            <div class="value">{{ first_name }}</div>
+        </div>
+        <div class="field">
+            <div class="label">{{ labels.date_of_birth }}</div>
+            <div class="value">{{ date_of_birth }}</div>
+        </div>
+        <div class="field">
+            <div class="label">{{ labels.zip_code }}</div>
+            <div class="value">{{ zip_code }}</div>
+        </div>
+        <div class="field">
+            <div class="label">{{ labels.general_health }}</div>
+            <div class="value">{{ general_health }}</div>
+        </div>
+        <div class="field">
+            <div class="label">{{ labels.moderate_activities }}</div>
+            <div class="value">{{ moderate_activities }}</div>
+        </div>
+        <div class="field">
+            <div class="label">{{ labels.climbing_stairs }}</div>
+            <div class="value">{{ climbing_stairs }}</div>
+        </div>
+        <div class="field">
+            <div class="label">{{ labels.language }}</div>
+            <div class="value">{{ language }}</div>
+        </div>
+        <div class="signature-box">
+            <div class="label">✓ Signature Captured</div>
+        </div>
+        <div class="field" style="margin-top: 20px;">
+            <div class="label">{{ labels.session_id }}</div>
+            <div class="value" style="font-size: 12px; font-family: monospace;">{{ session_id }}</div>
+        </div>
+    </div>
+    <div class="footer">
+        <p>This form was completed via the Zappix + Aldea AI Health Assessment Demo</p>
+        <p>© 2024 Zappix Inc. All rights reserved.</p>
+    </div>
+</body>
+</html>
+"""))
+
+_FORM_TITLES = {
+    Language.ENGLISH: "Completed Health Assessment Form",
+    Language.SPANISH: "Formulario de Evaluación de Salud Completado",
+}
+
+_FORM_LABELS = {
+    Language.ENGLISH: {
+        "name": "Name",
+        "date_of_birth": "Date of Birth",
+        "zip_code": "Zip Code",
+        "general_health": "General Health Status",
+        "moderate_activities": "Moderate Activities Limitation",
+        "climbing_stairs": "Climbing Stairs Limitation",
+        "language": "Preferred Language",
+        "session_id": "Session ID"
+    },
+    Language.SPANISH: {
+        "name": "Nombre",
+        "date_of_birth": "Fecha de Nacimiento",
+        "zip_code": "Código Postal",
+        "general_health": "Estado de Salud General",
+        "moderate_activities": "Limitación en Actividades Moderadas",
+        "climbing_stairs": "Limitación al Subir Escaleras",
+        "language": "Idioma Preferido",
+        "session_id": "ID de Sesión"
+    },
+}
+
+# Display strings for stored answer values
+_HEALTH_DISPLAY = {
+    Language.ENGLISH: {
+        "excellent": "Excellent",
+        "very_good": "Very Good",
+        "good": "Good",
+        "fair": "Fair",
+        "poor": "Poor"
+    },
+    Language.SPANISH: {
+        "excellent": "Excelente",
+        "very_good": "Muy Bueno",
+        "good": "Bueno",
+        "fair": "Regular",
+        "poor": "Malo"
+    },
+}
+
+_LIMITATION_DISPLAY = {
+    Language.ENGLISH: {
+        "limited_a_lot": "Limited a Lot",
+        "limited_a_little": "Limited a Little",
+        "not_limited": "Not Limited at All"
+    },
+    Language.SPANISH: {
+        "limited_a_lot": "Muy Limitado",
+        "limited_a_little": "Poco Limitado",
+        "not_limited": "Sin Limitación"
+    },
+}
+
 
 class EmailService:
     """Service for sending email notifications."""
 
+    QUEUE_SIZE = 1000
+    MAX_ATTEMPTS = 3
+    RETRY_BACKOFF = 2.0  # seconds, doubled after each failed attempt
+    ENQUEUE_TIMEOUT = 1.0
+    # Messages sent over one SMTP connection before it is replaced
+    MAX_MESSAGES_PER_CONNECTION = 100
+
     def __init__(self):
         self.settings = get_settings()
+        # One SMTP connection reused across sends (STARTTLS + AUTH once);
+        # the lock keeps the workers from using it at the same time
+        self._smtp: Optional[aiosmtplib.SMTP] = None
+        self._smtp_lock = asyncio.Lock()
+        self._sent_on_conn = 0
+        self._static_headers = (
+            f"From: Zappix Demo <{_SENDER}>\r\n"
+            f"To: {self.settings.notification_email}\r\n"
+            "MIME-Version: 1.0\r\n"
+        ).encode()
+        # Completed forms waiting to be emailed, drained by background workers
+        # so form submission never waits on SMTP
+        self._queue: asyncio.Queue[Tuple[CallSession, Optional[bytes]]] = asyncio.Queue(
+            maxsize=self.QUEUE_SIZE
+        )
+        self._workers: list[asyncio.Task] = []
+
+    def start(self):
+        """Start the email workers (called from the app lifespan)."""
+        if self._workers:
+            return
+        self._workers = [
+            asyncio.create_task(self._worker())
+            for _ in range(max(1, self.settings.email_workers))
+        ]
+
+    async def stop(self, drain_timeout: float = 10.0):
+        """Give queued emails a chance to go out, then stop the workers."""
+        if not self._workers:
+            return
+        try:
+            await asyncio.wait_for(self._queue.join(), timeout=drain_timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Stopping email workers with {self._queue.qsize()} emails unsent")
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        await self.close()
+
+    async def close(self):
+        """Close the cached SMTP connection."""
+        async with self._smtp_lock:
+            await self._disconnect()
+
+    async def enqueue_completed_form(
+        self,
+        session: CallSession,
+        signature_image: Optional[bytes] = None
+    ) -> bool:
+        """Queue the completed form email. Returns False if the queue stays full."""
+        item = (session, signature_image)
+        try:
+            self._queue.put_nowait(item)
+        except asyncio.QueueFull:
+            try:
+                await asyncio.wait_for(self._queue.put(item), timeout=self.ENQUEUE_TIMEOUT)
+            except asyncio.TimeoutError:
+                logger.error(f"Email queue full, dropping form email for session {session.session_id}")
+                return False
+        return True
+
+    async def _worker(self):
+        """Send queued form emails, retrying failures with backoff."""
+        while True:
+            session, signature_image = await self._queue.get()
+            try:
+                delay = self.RETRY_BACKOFF
+                for attempt in range(1, self.MAX_ATTEMPTS + 1):
+                    if await self.send_completed_form(session, signature_image):
+                        break
+                    if attempt < self.MAX_ATTEMPTS:
+                        await asyncio.sleep(delay)
+                        delay *= 2
+                else:
+                    logger.error(f"Giving up on form email for session {session.session_id}")
+            finally:
+                self._queue.task_done()
 
     def _create_form_html(self, session: CallSession) -> str:
         """Create HTML content for the completed form email."""
         lang = session.language
+        answers = session.answers
 
-        if lang == Language.SPANISH:
-            title = "Formulario de Evaluación de Salud Completado"
-            labels = {
-                "name": "Nombre",
-                "date_of_birth": "Fecha de Nacimiento",
-                "zip_code": "Código Postal",
-                "general_health": "Estado de Salud General",
-                "moderate_activities": "Limitación en Actividades Moderadas",
-                "climbing_stairs": "Limitación al Subir Escaleras",
-                "language": "Idioma Preferido",
-                "session_id": "ID de Sesión"
-            }
-        else:
-            title = "Completed Health Assessment Form"
-            labels = {
-                "name": "Name",
-                "date_of_birth": "Date of Birth",
-                "zip_code": "Zip Code",
-                "general_health": "General Health Status",
-                "moderate_activities": "Moderate Activities Limitation",
-                "climbing_stairs": "Climbing Stairs Limitation",
-                "language": "Preferred Language",
-                "session_id": "Session ID"
-            }
-
-        # Format answers for display
-        health_display = {
-            "excellent": "Excellent" if lang == Language.ENGLISH else "Excelente",
-            "very_good": "Very Good" if lang == Language.ENGLISH else "Muy Bueno",
-            "good": "Good" if lang == Language.ENGLISH else "Bueno",
-            "fair": "Fair" if lang == Language.ENGLISH else "Regular",
-            "poor": "Poor" if lang == Language.ENGLISH else "Malo"
-        }
-
-        limitation_display = {
-            "limited_a_lot": "Limited a Lot" if lang == Language.ENGLISH else "Muy Limitado",
-            "limited_a_little": "Limited a Little" if lang == Language.ENGLISH else "Poco Limitado",
-            "not_limited": "Not Limited at All" if lang == Language.ENGLISH else "Sin Limitación"
-        }
-
-        general_health = health_display.get(
-            session.answers.general_health, "N/A"
-        ) if session.answers.general_health else "N/A"
-
-        moderate_activities = limitation_display.get(
-            session.answers.moderate_activities_limitation, "N/A"
-        ) if session.answers.moderate_activities_limitation else "N/A"
-
-        climbing_stairs = limitation_display.get(
-            session.answers.climbing_stairs_limitation, "N/A"
-        ) if session.answers.climbing_stairs_limitation else "N/A"
-
-        html = f"""
-        <!DOCTYPE html>
-        <html>
-        <head>
-            <style>
-                body {{
-                    font-family: Arial, sans-serif;
-                    line-height: 1.6;
-                    color: #333;
-                    max-width: 600px;
-                    margin: 0 auto;
-                    padding: 20px;
-                }}
-                .header {{
-                    background: linear-gradient(135deg, #1a365d 0%, #2d5a87 100%);
-                    color: white;
-                    padding: 20px;
-                    border-radius: 8px 8px 0 0;
-                    text-align: center;
-                }}
-                .content {{
-                    background: #f8f9fa;
-                    padding: 20px;
-                    border: 1px solid #e9ecef;
-                }}
-                .field {{
-                    margin-bottom: 15px;
-                    padding: 10px;
-                    background: white;
-                    border-radius: 4px;
-                    border-left: 4px solid #2d5a87;
-                }}
-                .label {{
-                    font-weight: bold;
-                    color: #1a365d;
-                    font-size: 12px;
-                    text-transform: uppercase;
-                }}
-                .value {{
-                    font-size: 16px;
-                    margin-top: 5px;
-                }}
-                .footer {{
-                    background: #1a365d;
-                    color: white;
-                    padding: 15px;
-                    text-align: center;
-                    font-size: 12px;
-                    border-radius: 0 0 8px 8px;
-                }}
-                .signature-box {{
-                    border: 2px dashed #2d5a87;
-                    padding: 20px;
-                    text-align: center;
-                    background: white;
-                    margin-top: 10px;
-                }}
-            </style>
-        </head>
-        <body>
-            <div class="header">
-                <h1>{title}</h1>
-                <p>Zappix + Aldea AI Demo</p>
-            </div>
-            <div class="content">
-                <div class="field">
-                    <div class="label">{labels['name']}</div>
-                    <div class="value">{session.first_name}</div>
-                </div>
-                <div class="field">
-                    <div class="label">{labels['date_of_birth']}</div>
-                    <div class="value">{session.authentication.date_of_birth or 'N/A'}</div>
-                </div>
-                <div class="field">
-                    <div class="label">{labels['zip_code']}</div>
-                    <div class="value">{session.authentication.zip_code or 'N/A'}</div>
-                </div>
-                <div class="field">
-                    <div class="label">{labels['general_health']}</div>
-                    <div class="value">{general_health}</div>
-                </div>
-                <div class="field">
-                    <div class="label">{labels['moderate_activities']}</div>
-                    <div class="value">{moderate_activities}</div>
-                </div>
-                <div class="field">
-                    <div class="label">{labels['climbing_stairs']}</div>
-                    <div class="value">{climbing_stairs}</div>
-                </div>
-                <div class="field">
-                    <div class="label">{labels['language']}</div>
-                    <div class="value">{'Spanish' if lang == Language.SPANISH else 'English'}</div>
-                </div>
-                <div class="signature-box">
-                    <div class="label">✓ Signature Captured</div>
-                </div>
-                <div class="field" style="margin-top: 20px;">
-                    <div class="label">{labels['session_id']}</div>
-                    <div class="value" style="font-size: 12px; font-family: monospace;">{session.session_id}</div>
-                </div>
-            </div>
-            <div class="footer">
-                <p>This form was completed via the Zappix + Aldea AI Health Assessment Demo</p>
-                <p>© 2024 Zappix Inc. All rights reserved.</p>
-            </div>
-        </body>
-        </html>
-        """
-
-        return html
+        return _FORM_TEMPLATE.render(
+            title=_FORM_TITLES[lang],
+            labels=_FORM_LABELS[lang],
+            first_name=session.first_name,
+            date_of_birth=session.authentication.date_of_birth or "N/A",
+            zip_code=session.authentication.zip_code or "N/A",
+            general_health=_HEALTH_DISPLAY[lang].get(answers.general_health, "N/A"),
+            moderate_activities=_LIMITATION_DISPLAY[lang].get(answers.moderate_activities_limitation, "N/A"),
+            climbing_stairs=_LIMITATION_DISPLAY[lang].get(answers.climbing_stairs_limitation, "N/A"),
+            language="Spanish" if lang == Language.SPANISH else "English",
+            session_id=session.session_id,
+        )
 
     async def send_completed_form(
         self,
@@ -193,31 +323,10 @@ class EmailService:
     ) -> bool:
         """Send the completed form to the notification email."""
         try:
-            msg = MIMEMultipart("alternative")
-            msg["Subject"] = f"Health Assessment Form Completed - {session.first_name} ({session.session_id[:8]})"
-            msg["From"] = f"Zappix Demo <noreply@aldea.ai>"
-            msg["To"] = self.settings.notification_email
-
-            # Create HTML content
-            html_content = self._create_form_html(session)
-            msg.attach(MIMEText(html_content, "html"))
-
-            # Attach signature image if provided
-            if signature_image:
-                part = MIMEBase("image", "png")
-                part.set_payload(signature_image)
-                encoders.encode_base64(part)
-                part.add_header(
-                    "Content-Disposition",
-                    f"attachment; filename=signature_{session.session_id[:8]}.png"
-                )
-                msg.attach(part)
-
-            # Send email
-            with smtplib.SMTP(self.settings.smtp_host, self.settings.smtp_port) as server:
-                server.starttls()
-                server.login(self.settings.smtp_user, self.settings.smtp_password)
-                server.send_message(msg)
+            msg = self._build_message(session, signature_image)
+
+            async with self._smtp_lock:
+                await self._send_message(msg)
 
             logger.info(f"Sent completed form email for session {session.session_id}")
             return True
@@ -226,6 +335,80 @@ class EmailService:
             logger.error(f"Failed to send email for session {session.session_id}: {e}")
             return False
 
+    def _build_message(self, session: CallSession, signature_image: Optional[bytes]) -> bytes:
+        """The form email in wire format: HTML body, plus the signature as a PNG attachment."""
+        subject = f"Health Assessment Form Completed - {session.first_name} ({session.session_id[:8]})"
+        headers = self._static_headers + b"Subject: " + Header(subject, "utf-8").encode().encode() + b"\r\n"
+        html = base64.encodebytes(self._create_form_html(session).encode())
+
+        if not signature_image:
+            return headers + _HTML_PART_HEADERS + html
+
+        delimiter = b"--" + _BOUNDARY + b"\r\n"
+        return b"".join((
+            headers,
+            b'Content-Type: multipart/mixed; boundary="' + _BOUNDARY + b'"\r\n\r\n',
+            delimiter, _HTML_PART_HEADERS, html,
+            delimiter, _PNG_PART_HEADERS % session.session_id[:8].encode(), base64.encodebytes(signature_image),
+            b"--" + _BOUNDARY + b"--\r\n",
+        ))
+
+    async def _get_connection(self) -> aiosmtplib.SMTP:
+        """The cached SMTP connection if it still answers NOOP, else a new one."""
+        if self._smtp is not None and self._sent_on_conn >= self.MAX_MESSAGES_PER_CONNECTION:
+            await self._disconnect()
+
+        if self._smtp is not None:
+            try:
+                if (await self._smtp.noop()).code == 250:
+                    return self._smtp
+            except (aiosmtplib.SMTPException, OSError):
+                pass
+            await self._disconnect()
+
+        server = aiosmtplib.SMTP(
+            hostname=self.settings.smtp_host,
+            port=self.settings.smtp_port,
+            start_tls=False
+        )
+        try:
+            await server.connect()
+            await server.starttls()
+            await server.login(self.settings.smtp_user, self.settings.smtp_password)
+        except Exception:
+            server.close()
+            raise
+        self._smtp = server
+        self._sent_on_conn = 0
+        return server
+
+    async def _disconnect(self):
+        """Drop the cached SMTP connection."""
+        if self._smtp is None:
+            return
+        try:
+            await self._smtp.quit()
+        except (aiosmtplib.SMTPException, OSError):
+            self._smtp.close()
+        self._smtp = None
+
+    async def _send_message(self, msg: bytes):
+        """Deliver a message over SMTP. Retries once on a dropped connection."""
+        try:
+            server = await self._get_connection()
+            await server.sendmail(_SENDER, [self.settings.notification_email], msg)
+        except (aiosmtplib.SMTPServerDisconnected, OSError):
+            await self._disconnect()
+            server = await self._get_connection()
+            await server.sendmail(_SENDER, [self.settings.notification_email], msg)
+        self._sent_on_conn += 1
+        # The message is already accepted; a connection that can't reset
+        # is just dropped and replaced on the next send
+        try:
+            await server.rset()
+        except (aiosmtplib.SMTPException, OSError):
+            await self._disconnect()
+
 
 # Singleton instance
 email_service = EmailService()
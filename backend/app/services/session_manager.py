@@ -1,6 +1,11 @@
 import json
+import orjson
+import asyncio
+import time
 import redis.asyncio as redis
-from typing import Optional, Dict
+from redis.exceptions import WatchError
+from collections import OrderedDict
+from typing import Optional, Dict, Tuple, Callable
 from datetime import datetime
 import uuid
 import logging
@@ -10,15 +15,100 @@ from app.models.schemas import CallSession, Language, AuthenticationData, Health
 
 logger = logging.getLogger(__name__)
 
+# Sessions are Redis hashes with one field per top-level CallSession
+# attribute, each holding that attribute's JSON value. Updates write only
+# the fields that changed. They live under their own prefix: sessions
+# written before the switch are JSON strings at session:{id}, and are moved
+# to a hash the first time they're touched (see _migrate_legacy).
+_KEY_PREFIX = "session:v2:"
+_LEGACY_KEY_PREFIX = "session:"
+_STATUS_FLAGS = ("call_completed", "form_submitted", "opted_in_for_sms")
+
+# Set fields on an existing session and refresh its TTL in one round-trip.
+# Returns the updated hash, or nil (without creating anything) if the
+# session is gone.
+_SET_FIELDS_LUA = """
+if redis.call('EXISTS', KEYS[1]) == 0 then
+    return false
+end
+redis.call('HSET', KEYS[1], unpack(ARGV, 2))
+redis.call('EXPIRE', KEYS[1], ARGV[1])
+return redis.call('HGETALL', KEYS[1])
+"""
+
+
+def _session_fields(session: CallSession, include: Optional[set] = None) -> Dict[bytes, bytes]:
+    """A session (or just the included attributes) as hash fields: attribute name -> JSON value."""
+    return {
+        name.encode(): orjson.dumps(value)
+        for name, value in session.model_dump(mode="json", include=include).items()
+    }
+
+
+def _fields_to_json(fields: Dict[bytes, bytes]) -> bytes:
+    """Reassemble hash fields into the session's JSON document; the values are already JSON."""
+    return b"{" + b",".join(b'"%s":%s' % item for item in fields.items()) + b"}"
+
 
 class SessionManager:
     """Manages call sessions using Redis for persistence, with in-memory fallback."""
 
+    # A call's session is read by several webhooks and form requests within
+    # seconds; recent reads are served from process memory for this long
+    CACHE_TTL = 5.0
+    CACHE_SIZE = 4096
+    SESSION_TTL = 86400  # 24 hours
+    MEMORY_MAX_SESSIONS = 10_000
+
     def __init__(self):
         self.settings = get_settings()
         self._redis: Optional[redis.Redis] = None
         self._redis_available: Optional[bool] = None
-        self._memory_store: Dict[str, str] = {}  # In-memory fallback
+        self._set_fields_script = None
+        # In-memory fallback: key -> (expiry, session JSON), oldest write first.
+        # Bounded and expiring like the Redis keys, so it can't grow forever.
+        self._memory_store: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        # key -> (expiry, session JSON); the JSON is cached rather than the
+        # model so callers never share a mutable CallSession
+        self._cache: "OrderedDict[str, Tuple[float, bytes]]" = OrderedDict()
+        # key -> backend read in flight; concurrent misses share its result
+        self._fetches: Dict[str, asyncio.Future] = {}
+
+    def _cache_get(self, key: str) -> Optional[bytes]:
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            del self._cache[key]
+            return None
+        return entry[1]
+
+    def _cache_put(self, key: str, data: bytes):
+        self._cache[key] = (time.monotonic() + self.CACHE_TTL, data)
+        self._cache.move_to_end(key)
+        if len(self._cache) > self.CACHE_SIZE:
+            self._cache.popitem(last=False)
+
+    def _memory_get(self, key: str) -> Optional[bytes]:
+        entry = self._memory_store.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            del self._memory_store[key]
+            return None
+        return entry[1]
+
+    def _memory_put(self, key: str, data: bytes):
+        now = time.monotonic()
+        self._memory_store[key] = (now + self.SESSION_TTL, data)
+        self._memory_store.move_to_end(key)
+        # Every write moves its key to the end, so entries are in expiry
+        # order and the expired ones are all at the front
+        while self._memory_store:
+            oldest_key, (expiry, _) = next(iter(self._memory_store.items()))
+            if expiry >= now and len(self._memory_store) <= self.MEMORY_MAX_SESSIONS:
+                break
+            del self._memory_store[oldest_key]
 
     async def _check_redis_available(self) -> bool:
         """Check if Redis is available."""
@@ -26,13 +116,12 @@ class SessionManager:
             return self._redis_available
         
         try:
-            client = redis.from_url(
-                self.settings.redis_url,
-                encoding="utf-8",
-                decode_responses=True
-            )
+            # Replies stay bytes: they go straight to orjson/pydantic,
+            # so decoding them to str first would be wasted work
+            client = redis.from_url(self.settings.redis_url)
             await client.ping()
             self._redis = client
+            self._set_fields_script = client.register_script(_SET_FIELDS_LUA)
             self._redis_available = True
             logger.info("Redis connection established")
         except Exception as e:
@@ -61,47 +150,236 @@ class SessionManager:
             language=language,
         )
 
-        key = f"session:{session_id}"
-        data = session.model_dump_json()
-        
+        await self._save(session)
+        return session
+
+    async def _save(self, session: CallSession):
+        """Write every field of a session."""
+        key = f"{_KEY_PREFIX}{session.session_id}"
+        fields = _session_fields(session)
+        data = _fields_to_json(fields)
+
         r = await self.get_redis()
         if r:
-            await r.setex(key, 86400, data)  # 24 hour TTL
+            async with r.pipeline(transaction=True) as pipe:
+                pipe.hset(key, mapping=fields)
+                pipe.expire(key, self.SESSION_TTL)
+                await pipe.execute()
         else:
-            self._memory_store[key] = data
-
-        return session
+            self._memory_put(key, data)
+        self._cache_put(key, data)
 
     async def get_session(self, session_id: str) -> Optional[CallSession]:
         """Retrieve a session by ID."""
-        key = f"session:{session_id}"
-        
+        data = await self._get_data(session_id)
+        if data is None:
+            return None
+
+        return CallSession.model_validate_json(data)
+
+    async def _get_data(self, session_id: str) -> Optional[bytes]:
+        """A session's raw JSON, via the read cache."""
+        key = f"{_KEY_PREFIX}{session_id}"
+
+        data = self._cache_get(key)
+        if data is None:
+            fetch = self._fetches.get(key)
+            if fetch is None:
+                fetch = asyncio.ensure_future(self._fetch(session_id, key))
+                self._fetches[key] = fetch
+                # Dropped only once the read has finished, so every miss
+                # that arrives while it runs joins it
+                fetch.add_done_callback(lambda _: self._fetches.pop(key, None))
+            # Shielded so one cancelled caller doesn't cancel the others' read
+            data = await asyncio.shield(fetch)
+
+        return data
+
+    async def _fetch(self, session_id: str, key: str) -> Optional[bytes]:
+        data = await self._load(session_id)
+        if data is not None:
+            self._cache_put(key, data)
+        return data
+
+    async def get_status_flags(self, session_id: str) -> Optional[Dict[str, bool]]:
+        """
+        The call/form status flags of a session, without building a CallSession.
+        Returns None if the session doesn't exist.
+        Always read from the store: the flags are what status polls wait on,
+        so the read cache would only delay them.
+        """
+        key = f"{_KEY_PREFIX}{session_id}"
+
         r = await self.get_redis()
         if r:
-            data = await r.get(key)
-        else:
-            data = self._memory_store.get(key)
-
+            # Just the three fields (HMGET), not the whole session
+            values = await r.hmget(key, _STATUS_FLAGS)
+            if all(value is None for value in values):
+                if not await self._migrate_legacy(r, session_id):
+                    return None
+                values = await r.hmget(key, _STATUS_FLAGS)
+            return {
+                name: orjson.loads(value) if value is not None else False
+                for name, value in zip(_STATUS_FLAGS, values)
+            }
+
+        data = self._memory_get(key)
         if data is None:
             return None
+        fields = orjson.loads(data)
+        return {name: fields.get(name, False) for name in _STATUS_FLAGS}
 
-        return CallSession.model_validate_json(data)
+    async def exists(self, session_id: str) -> bool:
+        """Whether a session exists (a single EXISTS when not cached)."""
+        key = f"{_KEY_PREFIX}{session_id}"
+        if self._cache_get(key) is not None:
+            return True
+
+        r = await self.get_redis()
+        if r:
+            # Counts a not-yet-migrated legacy session too
+            return bool(await r.exists(key, f"{_LEGACY_KEY_PREFIX}{session_id}"))
+        return self._memory_get(key) is not None
+
+    async def _load(self, session_id: str) -> Optional[bytes]:
+        """Read a session's JSON from Redis or the in-memory store."""
+        key = f"{_KEY_PREFIX}{session_id}"
+        r = await self.get_redis()
+        if r:
+            fields = await r.hgetall(key)
+            if not fields and await self._migrate_legacy(r, session_id):
+                fields = await r.hgetall(key)
+            return _fields_to_json(fields) if fields else None
+        return self._memory_get(key)
+
+    async def _migrate_legacy(self, r: redis.Redis, session_id: str) -> bool:
+        """
+        Move a session stored as a JSON string at session:{id} to its hash,
+        keeping its remaining TTL. Returns False if there was none.
+        The legacy key is WATCHed and deleted in the same transaction, so a
+        session is only ever migrated once.
+        """
+        legacy_key = f"{_LEGACY_KEY_PREFIX}{session_id}"
+        key = f"{_KEY_PREFIX}{session_id}"
+        async with r.pipeline(transaction=True) as pipe:
+            while True:
+                try:
+                    await pipe.watch(legacy_key)
+                    if await pipe.type(legacy_key) != b"string":
+                        await pipe.unwatch()
+                        return False
+                    data = await pipe.get(legacy_key)
+                    ttl = await pipe.ttl(legacy_key)
+                    fields = {
+                        name.encode(): orjson.dumps(value)
+                        for name, value in orjson.loads(data).items()
+                    }
+
+                    pipe.multi()
+                    pipe.hset(key, mapping=fields)
+                    pipe.expire(key, ttl if ttl > 0 else self.SESSION_TTL)
+                    pipe.delete(legacy_key)
+                    await pipe.execute()
+                    logger.info(f"Migrated legacy session {session_id} to a hash")
+                    return True
+                except WatchError:
+                    continue
 
     async def update_session(self, session: CallSession) -> CallSession:
         """Update an existing session."""
         session.updated_at = datetime.utcnow()
+        await self._save(session)
+        return session
 
-        key = f"session:{session.session_id}"
-        data = session.model_dump_json()
-        
-        r = await self.get_redis()
-        if r:
-            await r.setex(key, 86400, data)
-        else:
-            self._memory_store[key] = data
+    async def _modify_session(
+        self,
+        session_id: str,
+        mutate: Callable[[CallSession], None],
+        fields: Tuple[str, ...]
+    ) -> Optional[CallSession]:
+        """
+        Atomically read, mutate and save a session.
+        With Redis this is WATCH/HGETALL then MULTI/HSET/EXEC, retried if
+        another writer got in between, so concurrent updates never overwrite
+        each other. Only the top-level fields the mutation touches (plus
+        updated_at) are serialized and written.
+        """
+        key = f"{_KEY_PREFIX}{session_id}"
 
+        r = await self.get_redis()
+        if not r:
+            data = self._memory_get(key)
+            if data is None:
+                return None
+            session = CallSession.model_validate_json(data)
+            mutate(session)
+            session.updated_at = datetime.utcnow()
+            data = _fields_to_json(_session_fields(session))
+            self._memory_put(key, data)
+            self._cache_put(key, data)
+            return session
+
+        async with r.pipeline(transaction=True) as pipe:
+            while True:
+                try:
+                    await pipe.watch(key)
+                    stored = await pipe.hgetall(key)
+                    if not stored:
+                        await pipe.unwatch()
+                        if await self._migrate_legacy(r, session_id):
+                            continue
+                        return None
+                    session = CallSession.model_validate_json(_fields_to_json(stored))
+                    mutate(session)
+                    session.updated_at = datetime.utcnow()
+                    changed = _session_fields(session, include={*fields, "updated_at"})
+
+                    pipe.multi()
+                    pipe.hset(key, mapping=changed)
+                    pipe.expire(key, self.SESSION_TTL)
+                    await pipe.execute()
+                    break
+                except WatchError:
+                    continue
+
+        self._cache_put(key, _fields_to_json({**stored, **changed}))
         return session
 
+    async def _set_fields(self, session_id: str, **values) -> Optional[CallSession]:
+        """
+        Set top-level fields of a session without reading it first.
+        With Redis this is a single script call (HSET + EXPIRE).
+        """
+        r = await self.get_redis()
+        if not r:
+            def mutate(session: CallSession):
+                for name, value in values.items():
+                    setattr(session, name, value)
+
+            return await self._modify_session(session_id, mutate, tuple(values))
+
+        key = f"{_KEY_PREFIX}{session_id}"
+        args = self._set_fields_args(values)
+        reply = await self._set_fields_script(keys=[key], args=args)
+        if reply is None:
+            if not await self._migrate_legacy(r, session_id):
+                return None
+            reply = await self._set_fields_script(keys=[key], args=args)
+            if reply is None:
+                return None
+
+        data = _fields_to_json(dict(zip(reply[::2], reply[1::2])))
+        self._cache_put(key, data)
+        return CallSession.model_validate_json(data)
+
+    def _set_fields_args(self, values: dict) -> list:
+        """Script arguments: the TTL, then field/JSON value pairs (updated_at included)."""
+        args = [self.SESSION_TTL]
+        for name, value in {**values, "updated_at": datetime.utcnow().isoformat()}.items():
+            args.append(name)
+            args.append(orjson.dumps(value))
+        return args
+
     async def update_authentication(
         self,
         session_id: str,
@@ -110,27 +388,24 @@ class SessionManager:
         last_four_ssn: Optional[str] = None
     ) -> Optional[CallSession]:
         """Update authentication data for a session."""
-        session = await self.get_session(session_id)
-        if session is None:
-            return None
-
-        if date_of_birth:
-            session.authentication.date_of_birth = date_of_birth
-        if zip_code:
-            session.authentication.zip_code = zip_code
-        if last_four_ssn:
-            session.authentication.last_four_ssn = last_four_ssn
-
-        # Check if authenticated (2 out of 3)
-        auth_fields = [
-            session.authentication.date_of_birth,
-            session.authentication.zip_code,
-            session.authentication.last_four_ssn
-        ]
-        provided_count = sum(1 for f in auth_fields if f is not None)
-        session.authentication.authenticated = provided_count >= 2
-
-        return await self.update_session(session)
+        def mutate(session: CallSession):
+            if date_of_birth:
+                session.authentication.date_of_birth = date_of_birth
+            if zip_code:
+                session.authentication.zip_code = zip_code
+            if last_four_ssn:
+                session.authentication.last_four_ssn = last_four_ssn
+
+            # Check if authenticated (2 out of 3)
+            auth_fields = [
+                session.authentication.date_of_birth,
+                session.authentication.zip_code,
+                session.authentication.last_four_ssn
+            ]
+            provided_count = sum(1 for f in auth_fields if f is not None)
+            session.authentication.authenticated = provided_count >= 2
+
+        return await self._modify_session(session_id, mutate, ("authentication",))
 
     async def update_answers(
         self,
@@ -140,18 +415,15 @@ class SessionManager:
         climbing_stairs: Optional[str] = None
     ) -> Optional[CallSession]:
         """Update health assessment answers for a session."""
-        session = await self.get_session(session_id)
-        if session is None:
-            return None
-
-        if general_health:
-            session.answers.general_health = general_health
-        if moderate_activities:
-            session.answers.moderate_activities_limitation = moderate_activities
-        if climbing_stairs:
-            session.answers.climbing_stairs_limitation = climbing_stairs
+        def mutate(session: CallSession):
+            if general_health:
+                session.answers.general_health = general_health
+            if moderate_activities:
+                session.answers.moderate_activities_limitation = moderate_activities
+            if climbing_stairs:
+                session.answers.climbing_stairs_limitation = climbing_stairs
 
-        return await self.update_session(session)
+        return await self._modify_session(session_id, mutate, ("answers",))
 
     async def set_sms_opt_in(
         self,
@@ -159,32 +431,83 @@ class SessionManager:
         cell_phone: str
     ) -> Optional[CallSession]:
         """Set SMS opt-in and phone number."""
-        session = await self.get_session(session_id)
-        if session is None:
-            return None
-
-        session.opted_in_for_sms = True
-        session.cell_phone_for_sms = cell_phone
-
-        return await self.update_session(session)
+        return await self._set_fields(session_id, opted_in_for_sms=True, cell_phone_for_sms=cell_phone)
 
     async def mark_call_completed(self, session_id: str) -> Optional[CallSession]:
         """Mark the call as completed."""
-        session = await self.get_session(session_id)
-        if session is None:
-            return None
+        return await self._set_fields(session_id, call_completed=True)
 
-        session.call_completed = True
-        return await self.update_session(session)
-
-    async def mark_form_submitted(self, session_id: str) -> Optional[CallSession]:
-        """Mark the form as submitted."""
-        session = await self.get_session(session_id)
+    async def mark_calls_completed(self, session_ids: list[str]) -> list[CallSession]:
+        """
+        Mark several calls as completed in one round-trip.
+        Returns the updated sessions (unknown IDs are skipped).
+        """
+        r = await self.get_redis()
+        if not r:
+            sessions = [await self.mark_call_completed(session_id) for session_id in session_ids]
+            return [session for session in sessions if session is not None]
+
+        # One script call per session, all sent in a single pipeline
+        args = self._set_fields_args({"call_completed": True})
+        keys = [f"{_KEY_PREFIX}{session_id}" for session_id in session_ids]
+        async with r.pipeline(transaction=False) as pipe:
+            for key in keys:
+                await self._set_fields_script(keys=[key], args=args, client=pipe)
+            replies = await pipe.execute()
+
+        sessions = []
+        for session_id, key, reply in zip(session_ids, keys, replies):
+            if reply is None:
+                if await self._migrate_legacy(r, session_id):
+                    session = await self.mark_call_completed(session_id)
+                    if session is not None:
+                        sessions.append(session)
+                continue
+            data = _fields_to_json(dict(zip(reply[::2], reply[1::2])))
+            self._cache_put(key, data)
+            sessions.append(CallSession.model_validate_json(data))
+        return sessions
+
+    async def _claim_flag(self, session_id: str, field: str) -> Optional[bool]:
+        """
+        Set a boolean field as an atomic check-and-set.
+        Returns True if this call set it, False if it already was set,
+        or None if the session doesn't exist.
+        """
+        already_set = False
+
+        def mutate(session: CallSession):
+            nonlocal already_set
+            already_set = getattr(session, field)
+            setattr(session, field, True)
+
+        session = await self._modify_session(session_id, mutate, (field,))
         if session is None:
             return None
-
-        session.form_submitted = True
-        return await self.update_session(session)
+        return not already_set
+
+    async def mark_form_submitted(self, session_id: str) -> Optional[bool]:
+        """
+        Mark the form as submitted. Returns True if this call submitted it,
+        False if it already was, or None if the session doesn't exist.
+        """
+        return await self._claim_flag(session_id, "form_submitted")
+
+    async def clear_form_submitted(self, session_id: str) -> Optional[CallSession]:
+        """Release a claimed submission whose form couldn't be processed."""
+        return await self._set_fields(session_id, form_submitted=False)
+
+    async def claim_sms(self, session_id: str) -> Optional[bool]:
+        """
+        Claim the form-link SMS for a session, so it's only sent once.
+        Returns True if this call claimed it, False if it was already sent
+        or being sent, or None if the session doesn't exist.
+        """
+        return await self._claim_flag(session_id, "sms_sent")
+
+    async def release_sms(self, session_id: str) -> Optional[CallSession]:
+        """Release a claimed SMS that couldn't be sent, so it can be retried."""
+        return await self._set_fields(session_id, sms_sent=False)
 
     async def close(self):
         """Close Redis connection."""
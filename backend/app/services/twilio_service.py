@@ -1,4 +1,9 @@
+import asyncio
 import logging
+from html import escape
+from typing import Optional
+from requests.adapters import HTTPAdapter
+from twilio.http.http_client import TwilioHttpClient
 from twilio.rest import Client
 from twilio.twiml.voice_response import VoiceResponse, Connect
 
@@ -7,6 +12,14 @@ from app.models.schemas import Language
 
 logger = logging.getLogger(__name__)
 
+# Stands in for the session ID when TwiML is rendered once as a template
+_SESSION_ID_PLACEHOLDER = "__SESSION_ID__"
+
+SMS_TEMPLATES = {
+    Language.ENGLISH: "Please review and sign your health assessment form: {url}",
+    Language.SPANISH: "Por favor revise y firme su formulario de evaluación de salud: {url}",
+}
+
 
 class TwilioService:
     """Service for Twilio voice calls and SMS."""
@@ -15,8 +28,32 @@ class TwilioService:
         self.settings = get_settings()
         self.client = Client(
             self.settings.twilio_account_sid,
-            self.settings.twilio_auth_token
+            self.settings.twilio_auth_token,
+            http_client=self._build_http_client()
         )
+        self._media_stream_twiml: Optional[bytes] = None
+        self._livekit_connect_twiml: Optional[str] = None
+
+    @staticmethod
+    def _build_http_client() -> TwilioHttpClient:
+        """
+        HTTP client with one pooled requests.Session, so API calls reuse
+        kept-alive TLS connections to api.twilio.com instead of handshaking.
+        """
+        http_client = TwilioHttpClient(pool_connections=True)
+        http_client.session.mount("https://", HTTPAdapter(pool_connections=10, pool_maxsize=20))
+        return http_client
+
+    async def warmup(self):
+        """
+        Make a cheap authenticated request so the pool already holds a
+        connection (TCP + TLS done) when the first call or SMS goes out.
+        """
+        try:
+            await asyncio.to_thread(self.client.api.accounts(self.settings.twilio_account_sid).fetch)
+            logger.info("Twilio API connection warmed up")
+        except Exception as e:
+            logger.warning(f"Twilio warm-up failed: {e}")
 
     async def initiate_outbound_call(
         self,
@@ -32,7 +69,9 @@ class TwilioService:
         # The TwiML will connect to our LiveKit room for the conversation
         twiml_url = f"{self.settings.backend_url}/api/twilio/voice/{session_id}"
 
-        call = self.client.calls.create(
+        # The REST client is synchronous; run it off the event loop
+        call = await asyncio.to_thread(
+            self.client.calls.create,
             to=to_number,
             from_=self.settings.twilio_phone_number,
             url=twiml_url,
@@ -56,13 +95,10 @@ class TwilioService:
         Returns the message SID.
         """
         form_url = f"{self.settings.frontend_url}/form/{session_id}"
+        body = SMS_TEMPLATES[language].format(url=form_url)
 
-        if language == Language.SPANISH:
-            body = f"Por favor revise y firme su formulario de evaluación de salud: {form_url}"
-        else:
-            body = f"Please review and sign your health assessment form: {form_url}"
-
-        message = self.client.messages.create(
+        message = await asyncio.to_thread(
+            self.client.messages.create,
             to=to_number,
             from_=self.settings.twilio_phone_number,
             body=body
@@ -74,34 +110,39 @@ class TwilioService:
     def generate_livekit_connect_twiml(self, session_id: str, room_name: str) -> str:
         """
         Generate TwiML to connect Twilio call to LiveKit room via SIP.
+        The helper library renders the document once with a placeholder
+        session ID; later calls only substitute the real one.
         """
-        response = VoiceResponse()
+        if self._livekit_connect_twiml is None:
+            response = VoiceResponse()
 
-        # Connect to LiveKit via SIP trunk
-        connect = Connect()
-        connect.stream(
-            url=f"wss://{self.settings.backend_url.replace('https://', '')}/api/twilio/media-stream/{session_id}",
-            name=f"livekit-{session_id}"
-        )
-        response.append(connect)
+            # Connect to LiveKit via SIP trunk
+            connect = Connect()
+            connect.stream(
+                url=f"wss://{self.settings.backend_url.replace('https://', '')}/api/twilio/media-stream/{_SESSION_ID_PLACEHOLDER}",
+                name=f"livekit-{_SESSION_ID_PLACEHOLDER}"
+            )
+            response.append(connect)
+            self._livekit_connect_twiml = str(response)
 
-        return str(response)
+        return self._livekit_connect_twiml.replace(_SESSION_ID_PLACEHOLDER, escape(session_id))
 
-    def generate_media_stream_twiml(self, session_id: str) -> str:
+    def generate_media_stream_twiml(self, session_id: str) -> bytes:
         """
         Generate TwiML to start a bidirectional media stream for real-time audio processing.
         Uses <Connect><Stream> for bidirectional audio (sending audio back to caller).
+        The document only varies by session ID, so it is filled into a cached
+        template rather than built with VoiceResponse on every webhook.
         """
-        response = VoiceResponse()
-
-        # Use Connect for bidirectional media stream
-        connect = Connect()
-        connect.stream(
-            url=f"wss://{self.settings.backend_url.replace('https://', '')}/api/twilio/media-stream/{session_id}"
-        )
-        response.append(connect)
-
-        return str(response)
+        if self._media_stream_twiml is None:
+            host = self.settings.backend_url.replace('https://', '')
+            self._media_stream_twiml = (
+                '<?xml version="1.0" encoding="UTF-8"?><Response><Connect>'
+                f'<Stream url="wss://{escape(host).replace("%", "%%")}/api/twilio/media-stream/%b" />'
+                '</Connect></Response>'
+            ).encode()
+
+        return self._media_stream_twiml % escape(session_id).encode()
 
 
 # Singleton instance
@@ -1,13 +1,118 @@
+import asyncio
 import logging
+import random
+import re
+import time
 import httpx
+import orjson
 from typing import Optional
-from urllib.parse import urlencode
+from urllib.parse import quote, urlencode
 
 from app.config import get_settings
 from app.models.schemas import Language, CallSession
+from app.services.session_manager import session_manager
 
 logger = logging.getLogger(__name__)
 
+# Internal answer values -> the wording Zappix expects
+_HEALTH_ANSWERS = {
+    "excellent": "Excellent",
+    "very_good": "Very Good",
+    "good": "Good",
+    "fair": "Fair",
+    "poor": "Poor"
+}
+_LIMITATION_ANSWERS = {
+    "limited_a_lot": "Limited a lot",
+    "limited_a_little": "Limited a bit",
+    "not_limited": "Not limited at all"
+}
+
+# What a number Zappix can text looks like once formatting is stripped
+_PHONE_RE = re.compile(r"^\+?\d{7,15}$")
+_PHONE_FORMATTING_RE = re.compile(r"[\s().-]")
+
+# Opening of the create-session body: the fields that only vary by
+# language, serialized once. customerLastName is always empty because
+# the current flow doesn't collect last names.
+_CREATE_SESSION_PREFIXES = {
+    Language.ENGLISH: b'{"locale":"en","customerLastName":"",',
+    Language.SPANISH: b'{"locale":"es","customerLastName":"",',
+}
+
+SMS_TEMPLATES = {
+    Language.ENGLISH: "Hello, Review & sign your health survey using this secure link: {link}",
+    Language.SPANISH: "Hola, Revise y firme su encuesta de salud usando este enlace seguro: {link}",
+}
+
+
+class CircuitBreaker:
+    """
+    Fails fast while an endpoint is down.
+    Opens after `threshold` consecutive failures. While open, one probe
+    request is let through per `cooldown` seconds (half-open); a success
+    closes the breaker, a failure keeps it open.
+    """
+
+    def __init__(self, name: str, threshold: int = 5, cooldown: float = 30.0):
+        self.name = name
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+
+    def allow(self) -> bool:
+        """Whether a request may be sent now."""
+        if self._opened_at is None:
+            return True
+        now = time.monotonic()
+        if now - self._opened_at < self.cooldown:
+            return False
+        # Let this one through as the probe; the next waits another cooldown
+        self._opened_at = now
+        return True
+
+    def record_success(self):
+        if self._opened_at is not None:
+            logger.info(f"Zappix {self.name} circuit closed")
+        self._failures = 0
+        self._opened_at = None
+
+    def record_failure(self):
+        self._failures += 1
+        if self._opened_at is None and self._failures >= self.threshold:
+            logger.warning(
+                f"Zappix {self.name} circuit open after {self._failures} failures, "
+                f"failing fast for {self.cooldown}s"
+            )
+            self._opened_at = time.monotonic()
+
+
+class TokenBucket:
+    """
+    Async token bucket: refills at `rate` tokens per second up to
+    `capacity`. acquire() waits for a token, so bursts beyond the
+    capacity are spread out at the rate. Waiters are served in order.
+    """
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
 
 class ZappixService:
     """Service for interacting with Zappix APIs."""
@@ -23,34 +128,139 @@ class ZappixService:
     # Zappix app base URL for the form link
     ZAPPIX_APP_BASE_URL = "https://qa.zappix.com/app/3606/session/"
 
+    # Flows run at once by create_sessions_and_send_sms_bulk
+    MAX_CONCURRENT_FLOWS = 20
+
+    # Retries of requests that never reached Zappix (connect failures and
+    # pool timeouts). Anything that may have been received is not retried:
+    # neither endpoint dedupes, so a retry could create a second session or
+    # text the patient twice.
+    MAX_ATTEMPTS = 3
+    RETRY_BASE = 0.25  # seconds; doubled per attempt, with full jitter
+    RETRY_CAP = 4.0
+
     def __init__(self):
-        self.settings = get_settings()
+        settings = get_settings()
+        # The two endpoints are on different hosts and fail independently,
+        # so each gets its own connection pool (a bulkhead: one hanging
+        # can't exhaust the other's connections) and circuit breaker
+        self._session_client: Optional[httpx.AsyncClient] = None
+        self._sms_client: Optional[httpx.AsyncClient] = None
+        self._create_session_breaker = CircuitBreaker("create-session")
+        self._send_sms_breaker = CircuitBreaker("send-sms")
+        # SMS text up to the Zappix session ID, which ends the form link
+        self._sms_prefixes = {
+            language: template.format(link=f"{self.ZAPPIX_APP_BASE_URL}?sid=")
+            for language, template in SMS_TEMPLATES.items()
+        }
+        # Carriers cap SMS throughput; bursts (e.g. a batch of completed
+        # calls) are shaped to this rate instead of being throttled
+        self._sms_bucket = TokenBucket(
+            rate=settings.zappix_sms_rate,
+            capacity=settings.zappix_sms_burst
+        )
+
+    @staticmethod
+    def _build_client(headers: dict[str, str]) -> httpx.AsyncClient:
+        """
+        Long-lived HTTP client so each request reuses a warm connection.
+        headers are the endpoint's static headers, sent with every request.
+        """
+        return httpx.AsyncClient(
+            headers=headers,
+            # Concurrent completion flows share connections as HTTP/2
+            # streams where the Zappix hosts negotiate it
+            http2=True,
+            limits=httpx.Limits(max_connections=50, max_keepalive_connections=20),
+            # Connecting fails fast (and is safe to retry). Read is generous:
+            # a request that times out mid-response may already have created
+            # the session or sent the SMS, so cutting slow successes short
+            # only turns them into reported failures
+            timeout=httpx.Timeout(connect=3.0, read=15.0, write=3.0, pool=2.0),
+        )
+
+    @property
+    def session_client(self) -> httpx.AsyncClient:
+        """Client for the create-session API."""
+        if self._session_client is None:
+            self._session_client = self._build_client({
+                "Content-Type": "application/json",
+                "clientId": self.CREATE_SESSION_CLIENT_ID
+            })
+        return self._session_client
+
+    @property
+    def sms_client(self) -> httpx.AsyncClient:
+        """Client for the send-SMS API."""
+        if self._sms_client is None:
+            self._sms_client = self._build_client({
+                "Content-Type": "application/x-www-form-urlencoded",
+                "clientId": self.SEND_SMS_CLIENT_ID
+            })
+        return self._sms_client
+
+    async def close(self):
+        """Close both HTTP clients."""
+        if self._session_client is not None:
+            await self._session_client.aclose()
+            self._session_client = None
+        if self._sms_client is not None:
+            await self._sms_client.aclose()
+            self._sms_client = None
+
+    async def _request(
+        self,
+        client: httpx.AsyncClient,
+        breaker: CircuitBreaker,
+        method: str,
+        url: str,
+        **kwargs
+    ) -> Optional[httpx.Response]:
+        """
+        Send a request on an endpoint's client and circuit breaker. Only
+        failures where the request provably never left (connect errors,
+        connect and pool timeouts) are retried, with capped exponential
+        backoff and full jitter. Returns the response, or None if the
+        breaker is (or became) open. Transport errors are re-raised.
+        """
+        for attempt in range(self.MAX_ATTEMPTS):
+            if attempt:
+                await asyncio.sleep(random.uniform(0, min(self.RETRY_CAP, self.RETRY_BASE * 2 ** attempt)))
+            if not breaker.allow():
+                return None
+
+            try:
+                response = await client.request(method, url, **kwargs)
+            except (httpx.ConnectError, httpx.ConnectTimeout, httpx.PoolTimeout) as e:
+                breaker.record_failure()
+                if attempt == self.MAX_ATTEMPTS - 1:
+                    raise
+                logger.warning(f"Zappix {breaker.name} attempt {attempt + 1} failed: {type(e).__name__}: {e}")
+                continue
+            except httpx.TransportError:
+                # Read/write timeouts etc.: Zappix may have acted on it
+                breaker.record_failure()
+                raise
+
+            # Only throttling and server errors count as an outage; any other
+            # answer (a 400 for one bad payload, say) shows the service is up
+            if response.status_code == 429 or response.status_code >= 500:
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+            return response
 
     def _format_health_answer(self, value: Optional[str]) -> str:
         """Convert internal health rating to Zappix format."""
         if not value:
             return ""
-
-        mapping = {
-            "excellent": "Excellent",
-            "very_good": "Very Good",
-            "good": "Good",
-            "fair": "Fair",
-            "poor": "Poor"
-        }
-        return mapping.get(value, value)
+        return _HEALTH_ANSWERS.get(value, value)
 
     def _format_limitation_answer(self, value: Optional[str]) -> str:
         """Convert internal limitation level to Zappix format."""
         if not value:
             return ""
-
-        mapping = {
-            "limited_a_lot": "Limited a lot",
-            "limited_a_little": "Limited a bit",
-            "not_limited": "Not limited at all"
-        }
-        return mapping.get(value, value)
+        return _LIMITATION_ANSWERS.get(value, value)
 
     async def create_session(
         self,
@@ -72,42 +282,43 @@ class ZappixService:
             "OptInToReviewAndSign": "Yes" if session.opted_in_for_sms else "No"
         }
 
-        # Determine locale based on language
-        locale = "es" if session.language == Language.SPANISH else "en"
-
-        # Build the request payload
+        # Build the request payload: the per-session fields, serialized and
+        # spliced after the pre-serialized locale/last-name prefix
         payload = {
-            "locale": locale,
             "customerPhoneNumber": session.cell_phone_for_sms or session.phone_number,
             "customerFirstName": session.first_name,
-            "customerLastName": "",  # We don't collect last name in the current flow
             "userAnswers": user_answers
         }
+        body = _CREATE_SESSION_PREFIXES[session.language] + orjson.dumps(payload)[1:]
 
         logger.info(f"Creating Zappix session for {session.session_id}")
-        logger.debug(f"Zappix payload: {payload}")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(f"Zappix payload: {body.decode()}")
 
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.post(
-                    self.CREATE_SESSION_URL,
-                    json=payload,
-                    headers={
-                        "Content-Type": "application/json",
-                        "clientId": self.CREATE_SESSION_CLIENT_ID
-                    },
-                    timeout=30.0
-                )
-
-                if response.status_code == 200:
-                    result = response.json()
-                    logger.info(f"Zappix session created: {result}")
-                    return result
-                else:
-                    logger.error(f"Zappix create session failed: {response.status_code} - {response.text}")
-                    return None
-
-        except Exception as e:
+            response = await self._request(
+                self.session_client,
+                self._create_session_breaker,
+                "POST",
+                self.CREATE_SESSION_URL,
+                content=body
+            )
+            if response is None:
+                logger.error(f"Zappix create session skipped for {session.session_id}: circuit open")
+                return None
+
+            logger.debug("Zappix create session responded over %s", response.http_version)
+            if response.status_code == 200:
+                result = orjson.loads(response.content)
+                logger.info(f"Zappix session created: {result}")
+                return result
+            else:
+                logger.error(f"Zappix create session failed: {response.status_code} - {response.text}")
+                return None
+
+        except (httpx.HTTPError, orjson.JSONDecodeError) as e:
+            # Network faults (after retries) and unparseable replies only;
+            # anything else is a bug and propagates
             logger.error(f"Error creating Zappix session: {e}")
             return None
 
@@ -128,81 +339,101 @@ class ZappixService:
         Returns:
             True on success, False on failure
         """
-        # Build the form link
-        form_link = f"{self.ZAPPIX_APP_BASE_URL}?sid={zappix_sid}"
-
-        # Build the SMS message based on language
-        if language == Language.SPANISH:
-            sms_message = f"Hola, Revise y firme su encuesta de salud usando este enlace seguro: {form_link}"
-        else:
-            sms_message = f"Hello, Review & sign your health survey using this secure link: {form_link}"
+        # Build the SMS message (with the form link) based on language
+        sms_message = self._sms_prefixes[language] + str(zappix_sid)
 
         # URL encode the message (& becomes %26, etc.)
-        # The Zappix API expects form-urlencoded parameters
-        params = {
-            "includeLink": "n",
-            "mobilePhoneNumber": phone_number,
-            "smsMessage": sms_message
-        }
+        # The Zappix API expects form-urlencoded parameters; the query
+        # string is built here once rather than through httpx's params
+        query = urlencode(
+            (
+                ("includeLink", "n"),
+                ("mobilePhoneNumber", phone_number.strip()),
+                ("smsMessage", sms_message)
+            ),
+            quote_via=quote
+        )
 
         logger.info(f"Sending Zappix SMS to {phone_number} with SID {zappix_sid}")
 
+        await self._sms_bucket.acquire()
+
         try:
-            async with httpx.AsyncClient() as client:
-                response = await client.get(
-                    self.SEND_SMS_URL,
-                    params=params,
-                    headers={
-                        "Content-Type": "application/x-www-form-urlencoded",
-                        "clientId": self.SEND_SMS_CLIENT_ID
-                    },
-                    timeout=30.0
-                )
-
-                if response.status_code == 200:
-                    result = response.json()
-                    if result.get("success"):
-                        logger.info(f"Zappix SMS sent successfully to {phone_number}")
-                        return True
-                    else:
-                        logger.error(f"Zappix SMS failed: {result.get('error')}")
-                        return False
+            response = await self._request(
+                self.sms_client,
+                self._send_sms_breaker,
+                "GET",
+                f"{self.SEND_SMS_URL}?{query}"
+            )
+            if response is None:
+                logger.error(f"Zappix SMS to {phone_number} skipped: circuit open")
+                return False
+
+            if response.status_code == 200:
+                result = orjson.loads(response.content)
+                # A rejected SMS still counts as the service being up
+                if result.get("success"):
+                    logger.info(f"Zappix SMS sent successfully to {phone_number}")
+                    return True
                 else:
-                    logger.error(f"Zappix send SMS failed: {response.status_code} - {response.text}")
+                    logger.error(f"Zappix SMS failed: {result.get('error')}")
                     return False
+            else:
+                logger.error(f"Zappix send SMS failed: {response.status_code} - {response.text}")
+                return False
 
-        except Exception as e:
+        except (httpx.HTTPError, orjson.JSONDecodeError) as e:
             logger.error(f"Error sending Zappix SMS: {e}")
             return False
 
     async def create_session_and_send_sms(
         self,
         session: CallSession,
-        additional_comments: str = ""
+        additional_comments: str = "",
+        require_opt_in: bool = True
     ) -> bool:
         """
         Combined flow: Create Zappix session and send SMS.
 
         This is the main method to call when the call is complete and
-        the user has opted in to receive the form.
+        the user has opted in to receive the form. Sessions that haven't
+        opted in (unless require_opt_in is False), whose number can't be
+        texted, or that were already texted are skipped without any network
+        call. The call-completed paths can both reach here for one call;
+        the SMS claim makes sure only one of them sends.
 
         Returns:
             True if both operations succeed, False otherwise
         """
-        # Step 1: Create Zappix session
-        result = await self.create_session(session, additional_comments)
+        if require_opt_in and not session.opted_in_for_sms:
+            logger.info(f"Session {session.session_id} not opted in for SMS, skipping Zappix")
+            return False
+
+        phone_number = session.cell_phone_for_sms or session.phone_number
+        if not phone_number or not _PHONE_RE.match(_PHONE_FORMATTING_RE.sub("", phone_number)):
+            logger.error(f"Invalid phone number for session {session.session_id}, skipping Zappix")
+            return False
 
-        if not result:
-            logger.error(f"Failed to create Zappix session for {session.session_id}")
+        if not await session_manager.claim_sms(session.session_id):
+            logger.info(f"SMS already sent for session {session.session_id}, skipping Zappix")
             return False
 
-        zappix_sid = result.get("zappixSid")
+        # Step 1: Create Zappix session
+        result = await self.create_session(session, additional_comments)
+        zappix_sid = result.get("zappixSid") if result else None
+
         if not zappix_sid:
-            logger.error(f"No zappixSid in response for {session.session_id}")
+            if not result:
+                logger.error(f"Failed to create Zappix session for {session.session_id}")
+            else:
+                logger.error(f"No zappixSid in response for {session.session_id}")
+            # Nothing was texted yet, so a later attempt may send it.
+            # Once the SMS request has gone out the claim is kept, since
+            # a failed or timed-out send may still have been delivered.
+            await session_manager.release_sms(session.session_id)
             return False
 
         # Step 2: Send SMS with form link
-        phone_number = session.cell_phone_for_sms or session.phone_number
         success = await self.send_sms(
             phone_number=phone_number,
             zappix_sid=zappix_sid,
@@ -216,6 +447,33 @@ class ZappixService:
 
         return success
 
+    async def create_sessions_and_send_sms_bulk(
+        self,
+        sessions: list[CallSession],
+        additional_comments: Optional[list[str]] = None
+    ) -> list[bool]:
+        """
+        Run create_session_and_send_sms for several sessions concurrently.
+        At most MAX_CONCURRENT_FLOWS run at once, matching the kept-alive
+        connection pool. Returns one result per session, in order; a flow
+        that raised counts as failed.
+        """
+        comments = additional_comments or [""] * len(sessions)
+        semaphore = asyncio.Semaphore(self.MAX_CONCURRENT_FLOWS)
+
+        async def run_one(session: CallSession, comment: str) -> bool:
+            async with semaphore:
+                return await self.create_session_and_send_sms(session, comment)
+
+        results = await asyncio.gather(
+            *(run_one(session, comment) for session, comment in zip(sessions, comments)),
+            return_exceptions=True
+        )
+        for session, result in zip(sessions, results):
+            if isinstance(result, BaseException):
+                logger.error(f"Zappix flow raised for session {session.session_id}: {result}")
+        return [result is True for result in results]
+
 
 # Singleton instance
 zappix_service = ZappixService()